@@ -6,6 +6,8 @@ class Settings(BaseSettings):
 
     health_tracker_api_token: str
     health_tracker_database_path: str = "./data/health.db"
+    # Trade durability for speed (in-memory journal, no fsync). Only for throwaway test databases.
+    health_tracker_sqlite_fast_writes: bool = False
 
     # Withings integration
     withings_client_id: str | None = None
@@ -4,6 +4,24 @@ from pathlib import Path
 
 from app.config import settings
 
+# Per-connection PRAGMAs applied when settings.health_tracker_sqlite_fast_writes is on
+FAST_WRITE_PRAGMAS = """
+PRAGMA journal_mode=MEMORY;
+PRAGMA synchronous=OFF;
+PRAGMA temp_store=MEMORY;
+"""
+
+# Per-connection PRAGMAs otherwise. The database runs in WAL mode (set once by
+# init_db; it persists in the file), where synchronous=NORMAL stays consistent
+# after a crash and only fsyncs at checkpoints
+WAL_PRAGMAS = """
+PRAGMA synchronous=NORMAL;
+PRAGMA temp_store=MEMORY;
+"""
+
+# Tables filled by Withings sync, deduplicated on a unique withings_id (NULL for manual entries)
+WITHINGS_SYNCED_TABLES = ("body_measurements", "blood_pressure", "sleep")
+
 SCHEMA = """
 -- User profile (single row)
 CREATE TABLE IF NOT EXISTS user_profile (
@@ -207,13 +225,22 @@ CREATE INDEX IF NOT EXISTS idx_sleep_date ON sleep(date);
 """
 
 
+def is_uri(path: str) -> bool:
+    """Whether a database path is an SQLite URI filename (e.g. file:/name?vfs=memdb)."""
+    return path.startswith("file:")
+
+
 async def init_db(db_path: str | None = None):
     """Initialize the database with schema."""
     path = db_path or settings.health_tracker_database_path
-    if path != ":memory:":
+    if path != ":memory:" and not is_uri(path):
         Path(path).parent.mkdir(parents=True, exist_ok=True)
 
-    async with aiosqlite.connect(path) as db:
+    async with aiosqlite.connect(path, uri=is_uri(path)) as db:
+        # Readers no longer block the writer (e.g. API reads during a Withings backfill)
+        if not settings.health_tracker_sqlite_fast_writes and path != ":memory:" and not is_uri(path):
+            await db.execute("PRAGMA journal_mode=WAL")
+
         # Check if supplements table needs migration (v1 -> v2)
         cursor = await db.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='supplements'")
         table_exists = await cursor.fetchone()
@@ -255,6 +282,22 @@ async def init_db(db_path: str | None = None):
 
             await db.commit()
 
+        # Enforce one row per Withings record now that every synced table has withings_id.
+        # Copies left by earlier syncs are identical, so keep the oldest before indexing
+        for table in WITHINGS_SYNCED_TABLES:
+            index = f"idx_{table}_withings_id"
+            cursor = await db.execute("SELECT name FROM sqlite_master WHERE type='index' AND name=?", (index,))
+            if not await cursor.fetchone():
+                await db.execute(
+                    f"""
+                    DELETE FROM {table} WHERE withings_id IS NOT NULL AND id NOT IN (
+                        SELECT MIN(id) FROM {table} WHERE withings_id IS NOT NULL GROUP BY withings_id
+                    )
+                    """  # nosec B608
+                )
+                await db.execute(f"CREATE UNIQUE INDEX {index} ON {table}(withings_id)")
+        await db.commit()
+
         # Migrate user_profile table to add timezone column
         cursor = await db.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='user_profile'")
         if await cursor.fetchone():
@@ -267,13 +310,45 @@ async def init_db(db_path: str | None = None):
                 await db.commit()
 
 
+# Idle connections kept open per database path for get_db to reuse, saving a
+# connect (and aiosqlite worker thread start) on every request
+POOL_SIZE = 4
+_pool: dict[str, list[aiosqlite.Connection]] = {}
+
+
+async def _connect(path: str) -> aiosqlite.Connection:
+    """Open a connection configured the way get_db hands them out."""
+    db = await aiosqlite.connect(path, uri=is_uri(path))
+    db.row_factory = aiosqlite.Row
+    await db.executescript(FAST_WRITE_PRAGMAS if settings.health_tracker_sqlite_fast_writes else WAL_PRAGMAS)
+    return db
+
+
 @asynccontextmanager
 async def get_db(db_path: str | None = None):
-    """Get a database connection."""
+    """Get a database connection, reusing an idle one for the same path when available."""
     path = db_path or settings.health_tracker_database_path
-    db = await aiosqlite.connect(path)
-    db.row_factory = aiosqlite.Row
+    idle = _pool.setdefault(path, [])
+    db = idle.pop() if idle else await _connect(path)
     try:
         yield db
-    finally:
+    except BaseException:
+        await db.close()
+        raise
+
+    # Discard anything left uncommitted, as closing the connection used to
+    if db.in_transaction:
+        await db.rollback()
+    if len(idle) < POOL_SIZE:
+        idle.append(db)
+    else:
         await db.close()
+
+
+async def close_pool():
+    """Close every idle pooled connection (at app shutdown, or between tests)."""
+    pools = list(_pool.values())
+    _pool.clear()
+    for idle in pools:
+        for db in idle:
+            await db.close()
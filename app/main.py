@@ -4,18 +4,21 @@ from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
-from app.database import init_db
+from app.database import init_db, close_pool
 from app.logging_config import configure_logging
 from app.routers import (
     profile, ingredients, recipes, foods, macros, body, exercises,
     supplements, phases, admin, withings, blood_pressure, activity, sleep
 )
+from app.services import withings_sync
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     await init_db()
     yield
+    await withings_sync.close_client()
+    await close_pool()
 
 
 app = FastAPI(
@@ -28,6 +28,16 @@ async def create_foods_from_recipe(
     return await food_service.create_foods_from_recipe(data)
 
 
+@router.post("/bulk", status_code=201)
+async def create_foods_bulk(
+    data: list[FoodCreate],
+    _: str = Depends(verify_token),
+) -> dict:
+    """Log many food entries in one request and one transaction."""
+    count = await food_service.bulk_create_foods(data)
+    return {"created": count}
+
+
 @router.get("", response_model=list[FoodResponse])
 async def get_foods(
     date: date = Query(..., description="Date to get foods for (YYYY-MM-DD)"),
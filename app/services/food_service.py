@@ -39,6 +39,39 @@ async def create_food(data: FoodCreate, db_path: str | None = None) -> FoodRespo
     return await get_food(food_id, db_path)
 
 
+async def bulk_create_foods(foods: list[FoodCreate], db_path: str | None = None) -> int:
+    """Create many food entries in a single transaction. Returns the number created."""
+    async with get_db(db_path) as db:
+        await db.executemany(
+            """
+            INSERT INTO foods (date, marker, name, amount, unit, calories, protein_g, carbs_g, fats_g, sodium_mg)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+            [
+                (
+                    data.date.isoformat(),
+                    data.marker,
+                    data.name,
+                    data.amount,
+                    data.unit,
+                    data.calories,
+                    data.protein_g,
+                    data.carbs_g,
+                    data.fats_g,
+                    data.sodium_mg,
+                )
+                for data in foods
+            ],
+        )
+        await db.commit()
+
+    # Invalidate cached snapshots once per affected date
+    for food_date in {data.date for data in foods}:
+        await invalidate_snapshot(food_date, db_path)
+
+    return len(foods)
+
+
 async def create_foods_from_recipe(data: FoodFromRecipe, db_path: str | None = None) -> list[FoodResponse]:
     """Create food entries from a recipe (expands to individual entries)."""
     recipe = await get_recipe(data.recipe_id, db_path)
@@ -17,7 +17,7 @@ from app.models.macro import (
     BodyMeasurementSummary,
 )
 from app.services.profile_service import get_profile
-from app.services.snapshot_service import compute_snapshot, get_or_create_snapshot
+from app.services.snapshot_service import compute_snapshot, generate_missing_snapshots
 from app.services.body_service import get_measurements_range
 from app.utils.timezone import current_date_in_timezone
 
@@ -142,9 +142,16 @@ async def get_macro_history(
     # Apply pagination to the days list
     paginated_days = all_days[offset:offset + limit]
 
+    # Paginated days are contiguous, so load or fill their snapshots as one range
+    snapshots = (
+        await generate_missing_snapshots(paginated_days[-1], paginated_days[0], db_path)
+        if paginated_days
+        else {}
+    )
+
     history_days = []
     for day in paginated_days:
-        macros = await get_or_create_snapshot(day, db_path)
+        macros = snapshots[day]
 
         body_summary = None
         if day in body_by_date:
@@ -80,24 +80,29 @@ async def create_recipe(data: RecipeCreate, db_path: str | None = None) -> Recip
                 )
             raise
 
-        for item in data.items:
+        # Validate every referenced ingredient with one query, then insert all items at once
+        ingredient_ids = list({item.ingredient_id for item in data.items})
+        if ingredient_ids:
+            placeholders = ", ".join("?" * len(ingredient_ids))
             cursor = await db.execute(
-                "SELECT id FROM ingredients WHERE id = ?",
-                (item.ingredient_id,),
+                f"SELECT id FROM ingredients WHERE id IN ({placeholders})",  # nosec B608
+                ingredient_ids,
             )
-            if not await cursor.fetchone():
-                raise HTTPException(
-                    status_code=status.HTTP_404_NOT_FOUND,
-                    detail=f"Ingredient with id {item.ingredient_id} not found",
-                )
+            existing_ids = {row["id"] for row in await cursor.fetchall()}
+            for item in data.items:
+                if item.ingredient_id not in existing_ids:
+                    raise HTTPException(
+                        status_code=status.HTTP_404_NOT_FOUND,
+                        detail=f"Ingredient with id {item.ingredient_id} not found",
+                    )
 
-            await db.execute(
-                """
-                INSERT INTO recipe_items (recipe_id, ingredient_id, amount, unit)
-                VALUES (?, ?, ?, ?)
-                """,
-                (recipe_id, item.ingredient_id, item.amount, item.unit),
-            )
+        await db.executemany(
+            """
+            INSERT INTO recipe_items (recipe_id, ingredient_id, amount, unit)
+            VALUES (?, ?, ?, ?)
+            """,
+            [(recipe_id, item.ingredient_id, item.amount, item.unit) for item in data.items],
+        )
         await db.commit()
 
     return await get_recipe(recipe_id, db_path)
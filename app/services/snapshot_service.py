@@ -3,32 +3,56 @@ from datetime import date, datetime, timedelta
 from app.database import get_db
 from app.models.macro import MacroTotals
 
+# Totals for a date with no food entries
+NO_FOODS = MacroTotals(calories=0, protein_g=0, carbs_g=0, fats_g=0, sodium_mg=0)
+
+
+def _summed_totals(row) -> MacroTotals:
+    """Build MacroTotals from a row of summed food macros."""
+    return MacroTotals(
+        calories=row["calories"],
+        protein_g=round(row["protein_g"], 1),
+        carbs_g=round(row["carbs_g"], 1),
+        fats_g=round(row["fats_g"], 1),
+        sodium_mg=row["sodium_mg"],
+    )
+
+
+def _snapshot_totals(row) -> MacroTotals:
+    """Build MacroTotals from a stored daily_snapshots row."""
+    return MacroTotals(
+        calories=row["calories"],
+        protein_g=row["protein_g"],
+        carbs_g=row["carbs_g"],
+        fats_g=row["fats_g"],
+        sodium_mg=row["sodium_mg"],
+    )
+
+
+async def _sum_foods(db, snapshot_date: date) -> MacroTotals:
+    """Sum macros for a date from the foods table on an open connection."""
+    cursor = await db.execute(
+        """
+        SELECT
+            COALESCE(SUM(calories), 0) as calories,
+            COALESCE(SUM(protein_g), 0) as protein_g,
+            COALESCE(SUM(carbs_g), 0) as carbs_g,
+            COALESCE(SUM(fats_g), 0) as fats_g,
+            COALESCE(SUM(sodium_mg), 0) as sodium_mg
+        FROM foods
+        WHERE date = ?
+        """,
+        (snapshot_date.isoformat(),),
+    )
+    row = await cursor.fetchone()
+
+    return _summed_totals(row)
+
 
 async def compute_snapshot(snapshot_date: date, db_path: str | None = None) -> MacroTotals:
     """Compute macro totals for a date from foods table."""
     async with get_db(db_path) as db:
-        cursor = await db.execute(
-            """
-            SELECT
-                COALESCE(SUM(calories), 0) as calories,
-                COALESCE(SUM(protein_g), 0) as protein_g,
-                COALESCE(SUM(carbs_g), 0) as carbs_g,
-                COALESCE(SUM(fats_g), 0) as fats_g,
-                COALESCE(SUM(sodium_mg), 0) as sodium_mg
-            FROM foods
-            WHERE date = ?
-            """,
-            (snapshot_date.isoformat(),),
-        )
-        row = await cursor.fetchone()
-
-        return MacroTotals(
-            calories=row["calories"],
-            protein_g=round(row["protein_g"], 1),
-            carbs_g=round(row["carbs_g"], 1),
-            fats_g=round(row["fats_g"], 1),
-            sodium_mg=row["sodium_mg"],
-        )
+        return await _sum_foods(db, snapshot_date)
 
 
 async def get_or_create_snapshot(snapshot_date: date, db_path: str | None = None) -> MacroTotals:
@@ -45,15 +69,10 @@ async def get_or_create_snapshot(snapshot_date: date, db_path: str | None = None
         row = await cursor.fetchone()
 
         if row:
-            return MacroTotals(
-                calories=row["calories"],
-                protein_g=row["protein_g"],
-                carbs_g=row["carbs_g"],
-                fats_g=row["fats_g"],
-                sodium_mg=row["sodium_mg"],
-            )
+            return _snapshot_totals(row)
 
-        totals = await compute_snapshot(snapshot_date, db_path)
+        # Reuse this connection rather than opening a second one via compute_snapshot
+        totals = await _sum_foods(db, snapshot_date)
 
         # Use INSERT OR REPLACE to handle race conditions - if another request
         # already inserted a row for this date, we'll just update it
@@ -79,12 +98,69 @@ async def get_or_create_snapshot(snapshot_date: date, db_path: str | None = None
 async def generate_missing_snapshots(
     start_date: date, end_date: date, db_path: str | None = None
 ) -> dict[date, MacroTotals]:
-    """Generate snapshots for all dates in range that don't have one."""
-    snapshots = {}
-    current = start_date
-    while current <= end_date:
-        snapshots[current] = await get_or_create_snapshot(current, db_path)
-        current = current + timedelta(days=1)
+    """Generate snapshots for all dates in range that don't have one.
+
+    Cached snapshots and the food sums for uncached dates are each read with a
+    single range query, and the new snapshots are stored in one transaction.
+    """
+    start, end = start_date.isoformat(), end_date.isoformat()
+    async with get_db(db_path) as db:
+        cursor = await db.execute(
+            "SELECT * FROM daily_snapshots WHERE date BETWEEN ? AND ?",
+            (start, end),
+        )
+        cached = {date.fromisoformat(row["date"]): _snapshot_totals(row) for row in await cursor.fetchall()}
+
+        cursor = await db.execute(
+            """
+            SELECT
+                date,
+                COALESCE(SUM(calories), 0) as calories,
+                COALESCE(SUM(protein_g), 0) as protein_g,
+                COALESCE(SUM(carbs_g), 0) as carbs_g,
+                COALESCE(SUM(fats_g), 0) as fats_g,
+                COALESCE(SUM(sodium_mg), 0) as sodium_mg
+            FROM foods
+            WHERE date BETWEEN ? AND ?
+            GROUP BY date
+            """,
+            (start, end),
+        )
+        summed = {date.fromisoformat(row["date"]): _summed_totals(row) for row in await cursor.fetchall()}
+
+        snapshots = {}
+        missing = []
+        current = start_date
+        while current <= end_date:
+            if current in cached:
+                snapshots[current] = cached[current]
+            else:
+                snapshots[current] = summed.get(current, NO_FOODS)
+                missing.append(current)
+            current = current + timedelta(days=1)
+
+        if missing:
+            # Same INSERT OR REPLACE as get_or_create_snapshot, so concurrent
+            # requests computing the same date cannot conflict
+            await db.executemany(
+                """
+                INSERT OR REPLACE INTO daily_snapshots (date, calories, protein_g, carbs_g, fats_g, sodium_mg)
+                VALUES (?, ?, ?, ?, ?, ?)
+                """,
+                [
+                    (
+                        day.isoformat(),
+                        snapshots[day].calories,
+                        snapshots[day].protein_g,
+                        snapshots[day].carbs_g,
+                        snapshots[day].fats_g,
+                        snapshots[day].sodium_mg,
+                    )
+                    for day in missing
+                ],
+            )
+            await db.commit()
+
     return snapshots
 
 
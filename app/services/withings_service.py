@@ -10,6 +10,11 @@ from app.config import settings
 from app.models.withings import WithingsTokens
 
 
+def _utcnow() -> datetime:
+    """Current UTC time as a naive datetime, matching how expires_at is stored."""
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
 def generate_nonce() -> str:
     """Generate a random nonce for Withings API calls."""
     return secrets.token_hex(16)
@@ -91,7 +96,7 @@ async def is_token_valid() -> bool:
     if not tokens:
         return False
     # Add 60 second buffer
-    return datetime.now(timezone.utc).replace(tzinfo=None) < tokens.expires_at - timedelta(seconds=60)
+    return _utcnow() < tokens.expires_at - timedelta(seconds=60)
 
 
 async def refresh_tokens() -> WithingsTokens | None:
@@ -122,7 +127,7 @@ async def refresh_tokens() -> WithingsTokens | None:
         return None
 
     body = data["body"]
-    expires_at = datetime.now(timezone.utc).replace(tzinfo=None) + timedelta(seconds=body["expires_in"])
+    expires_at = _utcnow() + timedelta(seconds=body["expires_in"])
 
     await save_tokens(
         access_token=body["access_token"],
@@ -181,7 +186,7 @@ async def exchange_code(code: str) -> WithingsTokens:
         )
 
     body = data["body"]
-    expires_at = datetime.now(timezone.utc).replace(tzinfo=None) + timedelta(seconds=body["expires_in"])
+    expires_at = _utcnow() + timedelta(seconds=body["expires_in"])
 
     await save_tokens(
         access_token=body["access_token"],
@@ -4,9 +4,13 @@ Withings data synchronization service.
 Handles fetching data from Withings API and storing it in local database.
 """
 from datetime import datetime, date, time, timedelta, timezone
-from typing import Any
+from functools import lru_cache
+from typing import Any, AsyncIterator
+import asyncio
 import httpx
 import logging
+import orjson
+import sys
 
 from app.database import get_db
 from app.services import withings_service
@@ -30,29 +34,104 @@ MEAS_TYPE_HEART_RATE = 11
 # Withings API limits
 MAX_ACTIVITY_DAYS = 200  # Withings limits activity/sleep to 200 days per request
 
+# Batch write statements for the sync functions
+INSERT_BODY_SQL = """
+INSERT INTO body_measurements
+(date, time, weight_lbs, waist_cm, fat_mass_lbs, muscle_mass_lbs, bone_mass_lbs, body_water_pct, source, withings_id)
+VALUES (?, ?, ?, NULL, ?, ?, ?, ?, 'withings', ?)
+ON CONFLICT(withings_id) DO NOTHING
+"""
+
+INSERT_BLOOD_PRESSURE_SQL = """
+INSERT INTO blood_pressure
+(date, time, systolic, diastolic, heart_rate, source, withings_id)
+VALUES (?, ?, ?, ?, ?, 'withings', ?)
+ON CONFLICT(withings_id) DO NOTHING
+"""
+
+INSERT_SLEEP_SQL = """
+INSERT INTO sleep
+(date, sleep_start, sleep_end, duration_minutes, deep_minutes, light_minutes, rem_minutes, awake_minutes, source, withings_id)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, 'withings', ?)
+ON CONFLICT(withings_id) DO NOTHING
+"""
+
+# Shared by every data fetch so backfills reuse keep-alive connections instead of
+# a new TCP + TLS handshake per call; created on first use, closed at app shutdown
+_client: httpx.AsyncClient | None = None
+
+
+def get_client() -> httpx.AsyncClient:
+    """Return the shared HTTP client for Withings data fetches."""
+    global _client
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(timeout=30.0)
+    return _client
+
+
+async def close_client() -> None:
+    """Close the shared HTTP client, if one was created."""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+# Unit conversion factors, applied inline in the sync loops
+LBS_PER_KG = 2.20462262
+MILES_PER_METER = 1 / 1609.344
+FEET_PER_METER = 3.2808399
+
+# 10 ** unit for the exponents Withings actually sends, looked up instead of computed per measure
+_UNIT_SCALE = {unit: 10 ** unit for unit in range(-9, 10)}
+
 
 def kg_to_lbs(kg: float) -> float:
     """Convert kilograms to pounds."""
-    return kg * 2.20462
+    return kg * LBS_PER_KG
 
 
 def meters_to_miles(m: float) -> float:
     """Convert meters to miles."""
-    return m / 1609.344
+    return m * MILES_PER_METER
 
 
 def meters_to_feet(m: float) -> float:
     """Convert meters to feet."""
-    return m * 3.28084
+    return m * FEET_PER_METER
 
 
 def parse_withings_value(value: int, unit: int) -> float:
     """Parse Withings measurement value with unit exponent."""
-    return value * (10 ** unit)
+    scale = _UNIT_SCALE.get(unit)
+    return value * (scale if scale is not None else 10 ** unit)
 
 
-async def fetch_measurements(start_date: date, end_date: date, meas_type: int | None = None, category: int | None = None) -> list[dict]:
-    """Fetch measurements from Withings Measure API with pagination support.
+def _measures_by_type(measures: list[dict]) -> dict[int, dict]:
+    """Index a measure group's measures by type code (a repeated type keeps the last one)."""
+    return {m["type"]: m for m in measures}
+
+
+def _measure_value(by_type: dict[int, dict], mtype: int) -> float | None:
+    """Parsed value of one measure type from _measures_by_type, or None if absent."""
+    m = by_type.get(mtype)
+    return parse_withings_value(m["value"], m["unit"]) if m is not None else None
+
+
+@lru_cache(maxsize=4096)
+def _utc_date_time(timestamp: int) -> tuple[str, str]:
+    """Split a Unix timestamp into UTC ISO date and time strings.
+
+    Cached because backfills parse every measure group twice (body and blood pressure).
+    """
+    dt = datetime.fromtimestamp(timestamp, tz=timezone.utc)
+    return dt.date().isoformat(), dt.time().isoformat()
+
+
+async def iter_measurement_pages(
+    start_date: date, end_date: date, meas_type: int | None = None, category: int | None = None
+) -> AsyncIterator[list[dict]]:
+    """Yield pages of measurement groups from the Withings Measure API as they arrive.
 
     Args:
         category: 1 = real measures, 2 = user objectives (BP uses category 1)
@@ -60,56 +139,64 @@ async def fetch_measurements(start_date: date, end_date: date, meas_type: int |
     token = await withings_service.get_valid_token()
     if not token:
         logger.error("No valid token for fetching measurements")
-        return []
+        return
 
-    all_groups = []
     offset = 0
 
-    async with httpx.AsyncClient(timeout=30.0) as client:
-        while True:
-            params = {
-                "action": "getmeas",
-                "startdate": int(datetime.combine(start_date, time.min).timestamp()),
-                "enddate": int(datetime.combine(end_date, time.max).timestamp()),
-            }
-            if meas_type:
-                params["meastype"] = meas_type
-            if category:
-                params["category"] = category
-            if offset:
-                params["offset"] = offset
-
-            try:
-                response = await client.post(
-                    WITHINGS_MEASURE_URL,
-                    data=params,
-                    headers={"Authorization": f"Bearer {token}"},
-                )
-                data = response.json()
-            except httpx.TimeoutException:
-                logger.error("Timeout fetching measurements from Withings")
-                break
-            except httpx.RequestError as e:
-                logger.error(f"Network error fetching measurements: {e}")
-                break
-            except ValueError as e:
-                logger.error(f"Invalid JSON response from Withings: {e}")
-                break
-
-            if data.get("status") != 0:
-                logger.error(f"Withings API error: {data}")
-                break
-
-            body = data.get("body", {})
-            groups = body.get("measuregrps", [])
-            all_groups.extend(groups)
-
-            # Check if there's more data (pagination)
-            if body.get("more") == 1 and body.get("offset"):
-                offset = body.get("offset")
-                logger.info(f"Fetching more measurements, offset={offset}")
-            else:
-                break
+    # Built once; only the offset changes from page to page
+    params = {
+        "action": "getmeas",
+        "startdate": int(datetime.combine(start_date, time.min).timestamp()),
+        "enddate": int(datetime.combine(end_date, time.max).timestamp()),
+    }
+    if meas_type:
+        params["meastype"] = meas_type
+    if category:
+        params["category"] = category
+    headers = {"Authorization": f"Bearer {token}"}
+
+    client = get_client()
+    while True:
+        if offset:
+            params["offset"] = offset
+
+        try:
+            response = await client.post(WITHINGS_MEASURE_URL, data=params, headers=headers)
+            data = orjson.loads(response.content)
+        except httpx.TimeoutException:
+            logger.error("Timeout fetching measurements from Withings")
+            break
+        except httpx.RequestError as e:
+            logger.error(f"Network error fetching measurements: {e}")
+            break
+        except ValueError as e:
+            logger.error(f"Invalid JSON response from Withings: {e}")
+            break
+
+        if data.get("status") != 0:
+            logger.error(f"Withings API error: {data}")
+            break
+
+        body = data.get("body", {})
+        yield body.get("measuregrps", [])
+
+        # Check if there's more data (pagination)
+        if body.get("more") == 1 and body.get("offset"):
+            offset = body.get("offset")
+            logger.info(f"Fetching more measurements, offset={offset}")
+        else:
+            break
+
+
+async def fetch_measurements(start_date: date, end_date: date, meas_type: int | None = None, category: int | None = None) -> list[dict]:
+    """Fetch all measurements from Withings Measure API, following pagination.
+
+    Args:
+        category: 1 = real measures, 2 = user objectives (BP uses category 1)
+    """
+    all_groups = []
+    async for groups in iter_measurement_pages(start_date, end_date, meas_type, category):
+        all_groups.extend(groups)
 
     logger.info(f"Fetched {len(all_groups)} measurement groups total")
     return all_groups
@@ -117,132 +204,84 @@ async def fetch_measurements(start_date: date, end_date: date, meas_type: int |
 
 async def sync_body_measurements(measure_groups: list[dict]) -> int:
     """Sync body measurements from Withings data. Returns count of new records."""
-    count = 0
+    rows = []
 
     for grp in measure_groups:
         grp_id = str(grp.get("grpid"))
         timestamp = grp.get("date")
         measures = grp.get("measures", [])
 
-        # Check for duplicate
-        async with get_db() as db:
-            cursor = await db.execute(
-                "SELECT id FROM body_measurements WHERE withings_id = ?",
-                (grp_id,),
-            )
-            if await cursor.fetchone():
-                continue  # Skip duplicate
-
         # Parse measurements
-        weight_kg = None
-        fat_mass_kg = None
-        muscle_mass_kg = None
-        bone_mass_kg = None
-        body_water_pct = None
-
-        for m in measures:
-            value = parse_withings_value(m["value"], m["unit"])
-            mtype = m["type"]
-
-            if mtype == MEAS_TYPE_WEIGHT:
-                weight_kg = value
-            elif mtype == MEAS_TYPE_FAT_MASS:
-                fat_mass_kg = value
-            elif mtype == MEAS_TYPE_MUSCLE_MASS:
-                muscle_mass_kg = value
-            elif mtype == MEAS_TYPE_BONE_MASS:
-                bone_mass_kg = value
-            elif mtype == MEAS_TYPE_BODY_WATER:
-                body_water_pct = value
+        by_type = _measures_by_type(measures)
+        weight_kg = _measure_value(by_type, MEAS_TYPE_WEIGHT)
 
         # Skip if no weight (we require weight for body measurements)
         if weight_kg is None:
             continue
 
+        fat_mass_kg = _measure_value(by_type, MEAS_TYPE_FAT_MASS)
+        muscle_mass_kg = _measure_value(by_type, MEAS_TYPE_MUSCLE_MASS)
+        bone_mass_kg = _measure_value(by_type, MEAS_TYPE_BONE_MASS)
+        body_water_pct = _measure_value(by_type, MEAS_TYPE_BODY_WATER)
+
         # Convert to US units
-        weight_lbs = kg_to_lbs(weight_kg)
-        fat_mass_lbs = kg_to_lbs(fat_mass_kg) if fat_mass_kg else None
-        muscle_mass_lbs = kg_to_lbs(muscle_mass_kg) if muscle_mass_kg else None
-        bone_mass_lbs = kg_to_lbs(bone_mass_kg) if bone_mass_kg else None
-
-        # Parse timestamp
-        dt = datetime.fromtimestamp(timestamp, tz=timezone.utc).replace(tzinfo=None)
-        meas_date = dt.date().isoformat()
-        meas_time = dt.time().isoformat()
-
-        # Insert into database
-        async with get_db() as db:
-            await db.execute(
-                """
-                INSERT INTO body_measurements
-                (date, time, weight_lbs, waist_cm, fat_mass_lbs, muscle_mass_lbs, bone_mass_lbs, body_water_pct, source, withings_id)
-                VALUES (?, ?, ?, NULL, ?, ?, ?, ?, 'withings', ?)
-                """,
-                (meas_date, meas_time, weight_lbs, fat_mass_lbs, muscle_mass_lbs, bone_mass_lbs, body_water_pct, grp_id),
-            )
-            await db.commit()
-            count += 1
+        weight_lbs = weight_kg * LBS_PER_KG
+        fat_mass_lbs = fat_mass_kg * LBS_PER_KG if fat_mass_kg else None
+        muscle_mass_lbs = muscle_mass_kg * LBS_PER_KG if muscle_mass_kg else None
+        bone_mass_lbs = bone_mass_kg * LBS_PER_KG if bone_mass_kg else None
 
-    return count
+        meas_date, meas_time = _utc_date_time(timestamp)
+
+        rows.append((meas_date, meas_time, weight_lbs, fat_mass_lbs, muscle_mass_lbs, bone_mass_lbs, body_water_pct, grp_id))
+
+    if not rows:
+        return 0
+
+    # Insert the whole batch in one transaction; groups already stored (or repeated
+    # earlier in this batch) hit the unique withings_id index and are skipped
+    async with get_db() as db:
+        changes = db.total_changes
+        await db.executemany(INSERT_BODY_SQL, rows)
+        await db.commit()
+        return db.total_changes - changes
 
 
 async def sync_blood_pressure(measure_groups: list[dict]) -> int:
     """Sync blood pressure from Withings data. Returns count of new records."""
-    count = 0
+    rows = []
 
     for grp in measure_groups:
         grp_id = str(grp.get("grpid"))
         timestamp = grp.get("date")
         measures = grp.get("measures", [])
 
-        # Check for duplicate
-        async with get_db() as db:
-            cursor = await db.execute(
-                "SELECT id FROM blood_pressure WHERE withings_id = ?",
-                (grp_id,),
-            )
-            if await cursor.fetchone():
-                continue
-
         # Parse measurements
-        systolic = None
-        diastolic = None
-        heart_rate = None
-
-        for m in measures:
-            value = parse_withings_value(m["value"], m["unit"])
-            mtype = m["type"]
-
-            if mtype == MEAS_TYPE_SYSTOLIC:
-                systolic = int(value)
-            elif mtype == MEAS_TYPE_DIASTOLIC:
-                diastolic = int(value)
-            elif mtype == MEAS_TYPE_HEART_RATE:
-                heart_rate = int(value)
+        by_type = _measures_by_type(measures)
+        systolic = _measure_value(by_type, MEAS_TYPE_SYSTOLIC)
+        diastolic = _measure_value(by_type, MEAS_TYPE_DIASTOLIC)
+        heart_rate = _measure_value(by_type, MEAS_TYPE_HEART_RATE)
 
         # Skip if no BP data
         if systolic is None or diastolic is None:
             continue
 
-        # Parse timestamp
-        dt = datetime.fromtimestamp(timestamp, tz=timezone.utc).replace(tzinfo=None)
-        meas_date = dt.date().isoformat()
-        meas_time = dt.time().isoformat()
-
-        # Insert into database
-        async with get_db() as db:
-            await db.execute(
-                """
-                INSERT INTO blood_pressure
-                (date, time, systolic, diastolic, heart_rate, source, withings_id)
-                VALUES (?, ?, ?, ?, ?, 'withings', ?)
-                """,
-                (meas_date, meas_time, systolic, diastolic, heart_rate, grp_id),
-            )
-            await db.commit()
-            count += 1
+        systolic = int(systolic)
+        diastolic = int(diastolic)
+        heart_rate = int(heart_rate) if heart_rate is not None else None
 
-    return count
+        meas_date, meas_time = _utc_date_time(timestamp)
+
+        rows.append((meas_date, meas_time, systolic, diastolic, heart_rate, grp_id))
+
+    if not rows:
+        return 0
+
+    # Same single-transaction batch insert as sync_body_measurements
+    async with get_db() as db:
+        changes = db.total_changes
+        await db.executemany(INSERT_BLOOD_PRESSURE_SQL, rows)
+        await db.commit()
+        return db.total_changes - changes
 
 
 def generate_date_chunks(start_date: date, end_date: date, chunk_days: int = MAX_ACTIVITY_DAYS) -> list[tuple[date, date]]:
@@ -261,22 +300,21 @@ async def fetch_activity_chunk(client: httpx.AsyncClient, token: str, start_date
     all_activities = []
     offset = 0
 
+    # Built once; only the offset changes from page to page
+    params = {
+        "action": "getactivity",
+        "startdateymd": start_date.isoformat(),
+        "enddateymd": end_date.isoformat(),
+    }
+    headers = {"Authorization": f"Bearer {token}"}
+
     while True:
-        params = {
-            "action": "getactivity",
-            "startdateymd": start_date.isoformat(),
-            "enddateymd": end_date.isoformat(),
-        }
         if offset:
             params["offset"] = offset
 
         try:
-            response = await client.post(
-                WITHINGS_ACTIVITY_URL,
-                data=params,
-                headers={"Authorization": f"Bearer {token}"},
-            )
-            data = response.json()
+            response = await client.post(WITHINGS_ACTIVITY_URL, data=params, headers=headers)
+            data = orjson.loads(response.content)
         except httpx.TimeoutException:
             logger.error("Timeout fetching activity from Withings")
             break
@@ -316,19 +354,39 @@ async def fetch_activity(start_date: date, end_date: date) -> list[dict]:
     chunks = generate_date_chunks(start_date, end_date, MAX_ACTIVITY_DAYS)
     logger.info(f"Fetching activity data in {len(chunks)} chunk(s)")
 
-    async with httpx.AsyncClient(timeout=30.0) as client:
-        for chunk_start, chunk_end in chunks:
-            logger.info(f"Fetching activity chunk: {chunk_start} to {chunk_end}")
-            activities = await fetch_activity_chunk(client, token, chunk_start, chunk_end)
-            all_activities.extend(activities)
+    client = get_client()
+    for chunk_start, chunk_end in chunks:
+        logger.info(f"Fetching activity chunk: {chunk_start} to {chunk_end}")
+        activities = await fetch_activity_chunk(client, token, chunk_start, chunk_end)
+        all_activities.extend(activities)
 
     logger.info(f"Fetched {len(all_activities)} activity records total")
     return all_activities
 
 
+# Activity rows per multi-row upsert; 5 parameters each stays under SQLite's
+# historical 999-variable limit
+ACTIVITY_UPSERT_CHUNK = 100
+
+
+@lru_cache(maxsize=None)
+def _upsert_activity_sql(row_count: int) -> str:
+    """Multi-row daily_activity upsert for row_count rows (one statement per chunk size)."""
+    values = ", ".join(["(?, ?, ?, ?, ?, 'withings')"] * row_count)
+    return f"""
+INSERT INTO daily_activity
+(date, steps, distance_miles, active_calories, elevation_ft, source)
+VALUES {values}
+ON CONFLICT(date) DO UPDATE
+SET steps = excluded.steps, distance_miles = excluded.distance_miles,
+    active_calories = excluded.active_calories, elevation_ft = excluded.elevation_ft,
+    source = 'withings', updated_at = CURRENT_TIMESTAMP
+"""
+
+
 async def sync_activity(activities: list[dict]) -> int:
     """Sync activity data from Withings. Returns count of upserted records."""
-    count = 0
+    rows = []
 
     for act in activities:
         act_date = act.get("date")
@@ -341,41 +399,23 @@ async def sync_activity(activities: list[dict]) -> int:
         elevation_m = act.get("elevation")
 
         # Convert units (calories must be int for Pydantic model)
-        distance_miles = meters_to_miles(distance_m) if distance_m else None
+        distance_miles = distance_m * MILES_PER_METER if distance_m else None
         active_calories = int(calories) if calories is not None else None
-        elevation_ft = meters_to_feet(elevation_m) if elevation_m else None
-
-        # Upsert into database (one row per day)
-        async with get_db() as db:
-            cursor = await db.execute(
-                "SELECT id FROM daily_activity WHERE date = ?",
-                (act_date,),
-            )
-            existing = await cursor.fetchone()
-
-            if existing:
-                await db.execute(
-                    """
-                    UPDATE daily_activity
-                    SET steps = ?, distance_miles = ?, active_calories = ?, elevation_ft = ?,
-                        source = 'withings', updated_at = CURRENT_TIMESTAMP
-                    WHERE date = ?
-                    """,
-                    (steps, distance_miles, active_calories, elevation_ft, act_date),
-                )
-            else:
-                await db.execute(
-                    """
-                    INSERT INTO daily_activity
-                    (date, steps, distance_miles, active_calories, elevation_ft, source)
-                    VALUES (?, ?, ?, ?, ?, 'withings')
-                    """,
-                    (act_date, steps, distance_miles, active_calories, elevation_ft),
-                )
-            await db.commit()
-            count += 1
+        elevation_ft = elevation_m * FEET_PER_METER if elevation_m else None
 
-    return count
+        rows.append((act_date, steps, distance_miles, active_calories, elevation_ft))
+
+    if not rows:
+        return 0
+
+    # Upsert the whole batch in one transaction (one row per day), many rows per statement
+    async with get_db() as db:
+        for i in range(0, len(rows), ACTIVITY_UPSERT_CHUNK):
+            chunk = rows[i:i + ACTIVITY_UPSERT_CHUNK]
+            await db.execute(_upsert_activity_sql(len(chunk)), [value for row in chunk for value in row])
+        await db.commit()
+
+    return len(rows)
 
 
 async def fetch_sleep_chunk(client: httpx.AsyncClient, token: str, start_date: date, end_date: date) -> list[dict]:
@@ -383,22 +423,21 @@ async def fetch_sleep_chunk(client: httpx.AsyncClient, token: str, start_date: d
     all_sleep = []
     offset = 0
 
+    # Built once; only the offset changes from page to page
+    params = {
+        "action": "getsummary",
+        "startdateymd": start_date.isoformat(),
+        "enddateymd": end_date.isoformat(),
+    }
+    headers = {"Authorization": f"Bearer {token}"}
+
     while True:
-        params = {
-            "action": "getsummary",
-            "startdateymd": start_date.isoformat(),
-            "enddateymd": end_date.isoformat(),
-        }
         if offset:
             params["offset"] = offset
 
         try:
-            response = await client.post(
-                WITHINGS_SLEEP_URL,
-                data=params,
-                headers={"Authorization": f"Bearer {token}"},
-            )
-            data = response.json()
+            response = await client.post(WITHINGS_SLEEP_URL, data=params, headers=headers)
+            data = orjson.loads(response.content)
         except httpx.TimeoutException:
             logger.error("Timeout fetching sleep from Withings")
             break
@@ -438,11 +477,11 @@ async def fetch_sleep(start_date: date, end_date: date) -> list[dict]:
     chunks = generate_date_chunks(start_date, end_date, MAX_ACTIVITY_DAYS)
     logger.info(f"Fetching sleep data in {len(chunks)} chunk(s)")
 
-    async with httpx.AsyncClient(timeout=30.0) as client:
-        for chunk_start, chunk_end in chunks:
-            logger.info(f"Fetching sleep chunk: {chunk_start} to {chunk_end}")
-            sleep_data = await fetch_sleep_chunk(client, token, chunk_start, chunk_end)
-            all_sleep.extend(sleep_data)
+    client = get_client()
+    for chunk_start, chunk_end in chunks:
+        logger.info(f"Fetching sleep chunk: {chunk_start} to {chunk_end}")
+        sleep_data = await fetch_sleep_chunk(client, token, chunk_start, chunk_end)
+        all_sleep.extend(sleep_data)
 
     logger.info(f"Fetched {len(all_sleep)} sleep records total")
     return all_sleep
@@ -450,7 +489,7 @@ async def fetch_sleep(start_date: date, end_date: date) -> list[dict]:
 
 async def sync_sleep(sleep_data: list[dict]) -> int:
     """Sync sleep data from Withings. Returns count of new records."""
-    count = 0
+    rows = []
 
     for sleep in sleep_data:
         sleep_id = str(sleep.get("id", sleep.get("date", "")))
@@ -459,22 +498,13 @@ async def sync_sleep(sleep_data: list[dict]) -> int:
         if not sleep_date:
             continue
 
-        # Check for duplicate
-        async with get_db() as db:
-            cursor = await db.execute(
-                "SELECT id FROM sleep WHERE withings_id = ?",
-                (sleep_id,),
-            )
-            if await cursor.fetchone():
-                continue
-
         # Parse sleep data
         startdate = sleep.get("startdate")
         enddate = sleep.get("enddate")
         data = sleep.get("data", {})
 
-        sleep_start = datetime.fromtimestamp(startdate, tz=timezone.utc).replace(tzinfo=None).isoformat() if startdate else None
-        sleep_end = datetime.fromtimestamp(enddate, tz=timezone.utc).replace(tzinfo=None).isoformat() if enddate else None
+        sleep_start = "T".join(_utc_date_time(startdate)) if startdate else None
+        sleep_end = "T".join(_utc_date_time(enddate)) if enddate else None
 
         # Duration in seconds, convert to minutes
         duration_seconds = data.get("durationtosleep", 0) + data.get("durationtowakeup", 0)
@@ -486,20 +516,28 @@ async def sync_sleep(sleep_data: list[dict]) -> int:
         rem_minutes = data.get("remsleepduration", 0) // 60 if data.get("remsleepduration") else None
         awake_minutes = data.get("wakeupduration", 0) // 60 if data.get("wakeupduration") else None
 
-        # Insert into database
-        async with get_db() as db:
-            await db.execute(
-                """
-                INSERT INTO sleep
-                (date, sleep_start, sleep_end, duration_minutes, deep_minutes, light_minutes, rem_minutes, awake_minutes, source, withings_id)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, 'withings', ?)
-                """,
-                (sleep_date, sleep_start, sleep_end, duration_minutes, deep_minutes, light_minutes, rem_minutes, awake_minutes, sleep_id),
-            )
-            await db.commit()
-            count += 1
+        rows.append((sleep_date, sleep_start, sleep_end, duration_minutes, deep_minutes, light_minutes, rem_minutes, awake_minutes, sleep_id))
 
-    return count
+    if not rows:
+        return 0
+
+    # Same single-transaction batch insert as sync_body_measurements
+    async with get_db() as db:
+        changes = db.total_changes
+        await db.executemany(INSERT_SLEEP_SQL, rows)
+        await db.commit()
+        return db.total_changes - changes
+
+
+# Webhook appli code -> (fetch function, store function) for that data type. The
+# fetch function is looked up on the module by name at dispatch, so patching e.g.
+# withings_sync.fetch_measurements (as the tests do) still takes effect
+_APPLI_HANDLERS = {
+    1: (fetch_measurements, sync_body_measurements),  # Weight/Body composition
+    4: (fetch_measurements, sync_blood_pressure),  # Blood pressure
+    16: (fetch_activity, sync_activity),  # Activity
+    44: (fetch_sleep, sync_sleep),  # Sleep
+}
 
 
 async def sync_by_appli(appli: int, startdate: int | None = None, enddate: int | None = None) -> int:
@@ -516,26 +554,18 @@ async def sync_by_appli(appli: int, startdate: int | None = None, enddate: int |
 
     logger.info(f"Syncing appli={appli} from {start} to {end}")
 
-    if appli == 1:  # Weight/Body composition
-        groups = await fetch_measurements(start, end)
-        logger.info(f"Fetched {len(groups)} measurement groups for body")
-        return await sync_body_measurements(groups)
-    elif appli == 4:  # Blood pressure
-        groups = await fetch_measurements(start, end)
-        logger.info(f"Fetched {len(groups)} measurement groups for BP")
-        count = await sync_blood_pressure(groups)
-        logger.info(f"Synced {count} blood pressure records")
-        return count
-    elif appli == 16:  # Activity
-        activities = await fetch_activity(start, end)
-        return await sync_activity(activities)
-    elif appli == 44:  # Sleep
-        sleep_data = await fetch_sleep(start, end)
-        return await sync_sleep(sleep_data)
-    else:
+    handler = _APPLI_HANDLERS.get(appli)
+    if handler is None:
         logger.warning(f"Unknown appli code: {appli}")
         return 0
 
+    fetch, store = handler
+    records = await getattr(sys.modules[__name__], fetch.__name__)(start, end)
+    logger.info(f"Fetched {len(records)} records for appli={appli}")
+    count = await store(records)
+    logger.info(f"Synced {count} records for appli={appli}")
+    return count
+
 
 async def backfill_all(start_date: date, end_date: date) -> dict[str, int]:
     """Backfill all data types for a date range. Returns counts by type."""
@@ -546,18 +576,34 @@ async def backfill_all(start_date: date, end_date: date) -> dict[str, int]:
         "sleep": 0,
     }
 
-    # Fetch and sync body measurements (includes weight + body comp)
-    groups = await fetch_measurements(start_date, end_date)
-    counts["body_measurements"] = await sync_body_measurements(groups)
-    counts["blood_pressure"] = await sync_blood_pressure(groups)
-
-    # Fetch and sync activity
-    activities = await fetch_activity(start_date, end_date)
-    counts["daily_activity"] = await sync_activity(activities)
-
-    # Fetch and sync sleep
-    sleep_data = await fetch_sleep(start_date, end_date)
-    counts["sleep"] = await sync_sleep(sleep_data)
+    # Refresh the token (if needed) once up front, so the concurrent fetches
+    # below don't each try to rotate it
+    await withings_service.get_valid_token()
+
+    # The three APIs are independent, so fetch them concurrently and store each
+    # type as soon as it arrives, overlapping its writes with the fetches still in
+    # flight. SQLite allows one writer at a time, so the stores take turns
+    write_lock = asyncio.Lock()
+
+    async def backfill_measurements():
+        # Years of measurements span many pages; store each as it arrives rather
+        # than holding them all. Groups hold both weight/body comp and blood pressure
+        async for groups in iter_measurement_pages(start_date, end_date):
+            async with write_lock:
+                counts["body_measurements"] += await sync_body_measurements(groups)
+                counts["blood_pressure"] += await sync_blood_pressure(groups)
+
+    async def backfill_activity():
+        activities = await fetch_activity(start_date, end_date)
+        async with write_lock:
+            counts["daily_activity"] = await sync_activity(activities)
+
+    async def backfill_sleep():
+        sleep_data = await fetch_sleep(start_date, end_date)
+        async with write_lock:
+            counts["sleep"] = await sync_sleep(sleep_data)
+
+    await asyncio.gather(backfill_measurements(), backfill_activity(), backfill_sleep())
 
     return counts
 
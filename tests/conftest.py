@@ -1,51 +1,197 @@
+import copy
+import hashlib
+import hmac
+import itertools
 import os
+import sqlite3
 import tempfile
+from contextlib import closing
+from datetime import datetime, timedelta
+from functools import lru_cache
+from types import MappingProxyType
+
+import orjson
 import pytest
 import pytest_asyncio
+import uvloop
 from httpx import AsyncClient, ASGITransport
 
 # Set environment variables BEFORE importing app modules
 TEST_TOKEN = "test-token"
 os.environ["HEALTH_TRACKER_API_TOKEN"] = TEST_TOKEN
+# Test databases are throwaway copies; skip the journal file and fsyncs
+os.environ["HEALTH_TRACKER_SQLITE_FAST_WRITES"] = "1"
 
-from app.database import init_db, get_db, SCHEMA
+from app.database import init_db, get_db, close_pool, is_uri, SCHEMA
 from app.config import settings
+from app.main import app
+from app.services import recipe_service, withings_service
+
+SAMPLE_INGREDIENTS = [
+    {
+        "name": "Whey Protein",
+        "default_amount": 1,
+        "default_unit": "scoop",
+        "calories": 120,
+        "protein_g": 24,
+        "carbs_g": 3,
+        "fats_g": 1,
+        "sodium_mg": 50,
+    },
+    {
+        "name": "Almond Milk",
+        "default_amount": 1,
+        "default_unit": "cup",
+        "calories": 30,
+        "protein_g": 1,
+        "carbs_g": 1,
+        "fats_g": 2.5,
+        "sodium_mg": 180,
+    },
+    {
+        "name": "Banana",
+        "default_amount": 1,
+        "default_unit": "medium",
+        "calories": 105,
+        "protein_g": 1.3,
+        "carbs_g": 27,
+        "fats_g": 0.4,
+        "sodium_mg": 1,
+    },
+]
+
+# (amount, unit) for each SAMPLE_INGREDIENTS entry in the sample recipe
+SAMPLE_RECIPE_ITEMS = [(1, "scoop"), (1.5, "cup"), (1, "medium")]
+
+
+@lru_cache(maxsize=None)
+def _hmac_template(secret: str):
+    """HMAC-SHA256 keyed with secret, copied per body rather than redoing the key setup."""
+    return hmac.new(secret.encode(), digestmod=hashlib.sha256)
+
+
+def sign(body: bytes, secret: str = "test_secret") -> str:
+    """Hex HMAC-SHA256 signature of a webhook body, as Withings sends it, under secret."""
+    mac = _hmac_template(secret).copy()
+    mac.update(body)
+    return mac.hexdigest()
+
+
+# Webhook payload signed with the withings_settings client secret, computed once per session
+WEBHOOK_BODY = b"appli=1&userid=12345"
+WEBHOOK_SIGNATURE = sign(WEBHOOK_BODY)
+
+
+def pytest_asyncio_loop_factories(config, item):
+    """Run async tests and fixtures on uvloop instead of the default asyncio loop."""
+    return {"uvloop": uvloop.new_event_loop}
+
+
+def json_body(response):
+    """Decode a response body with orjson (faster than httpx's stdlib-based .json())."""
+    return orjson.loads(response.content)
+
+
+def connect_sync(path: str) -> sqlite3.Connection:
+    """Open a stdlib sqlite3 connection, accepting plain paths or URI filenames."""
+    return sqlite3.connect(path, uri=is_uri(path), check_same_thread=False)
+
+
+def copy_db(source_path: str, target_path: str):
+    """Overwrite target_path with the contents of source_path via the SQLite backup API."""
+    with closing(connect_sync(source_path)) as source, closing(connect_sync(target_path)) as target:
+        source.backup(target)
+
+
+@pytest_asyncio.fixture(scope="session", autouse=True)
+async def db_pool():
+    """Close get_db's pooled connections at the end of the session.
+
+    Their worker threads are not daemons, so left open they would keep the
+    interpreter from exiting. test_db closes them after each test; this also
+    covers tests that use get_db on their own tmp_path databases.
+    """
+    yield
+    await close_pool()
+
+
+@pytest_asyncio.fixture(scope="session")
+async def schema_template(tmp_path_factory):
+    """Initialize the schema once per session into a template database."""
+    path = str(tmp_path_factory.mktemp("schema") / "template.db")
+    await init_db(path)
+    return path
+
+
+_memdb_ids = itertools.count()
 
 
 @pytest.fixture(scope="function")
-def test_db_path(tmp_path):
-    """Create a temporary database file for each test."""
-    db_file = tmp_path / "test.db"
-    return str(db_file)
+def test_db_path():
+    """Name a fresh in-memory database for each test.
+
+    The memdb VFS shares one in-memory database between every connection in
+    the process that opens the same name, with ordinary file locking (unlike
+    cache=shared, whose table locks fail fast instead of waiting). Names are
+    only visible within a process, so xdist workers never collide.
+    """
+    return f"file:/test-{next(_memdb_ids)}.db?vfs=memdb"
 
 
 @pytest_asyncio.fixture(scope="function")
-async def test_db(test_db_path, monkeypatch):
+async def test_db(test_db_path, schema_template, monkeypatch):
     """Initialize test database and patch settings."""
     # Patch settings to use test database
     monkeypatch.setattr(settings, "health_tracker_database_path", test_db_path)
     monkeypatch.setattr(settings, "health_tracker_api_token", TEST_TOKEN)
 
-    # Initialize the database
-    await init_db(test_db_path)
+    # An in-memory database is freed when its last connection closes, so hold
+    # one open for the whole test and load the session's schema template into it
+    with closing(connect_sync(test_db_path)):
+        copy_db(schema_template, test_db_path)
+        yield test_db_path
+        # Release get_db's pooled connections too, or the database outlives the test
+        await close_pool()
 
-    yield test_db_path
 
+@pytest_asyncio.fixture(scope="session")
+async def session_client():
+    """One ASGI test client shared by the whole session."""
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        yield ac
 
-@pytest_asyncio.fixture(scope="function")
-async def client(test_db):
-    """Create test client with initialized database."""
-    from app.main import app
 
+@pytest.fixture(scope="function")
+def client(session_client, test_db):
+    """Test client pointed at this test's freshly initialized database."""
+    return session_client
+
+
+@pytest_asyncio.fixture(scope="session")
+async def session_authenticated_client(auth_headers):
+    """One ASGI test client, shared by the whole session, that sends the API token on every request."""
     transport = ASGITransport(app=app)
-    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+    async with AsyncClient(transport=transport, base_url="http://test", headers=auth_headers) as ac:
         yield ac
 
 
-@pytest.fixture
+@pytest.fixture(scope="function")
+def authenticated_client(session_authenticated_client, test_db):
+    """Authenticated test client pointed at this test's freshly initialized database."""
+    return session_authenticated_client
+
+
+@pytest.fixture(scope="session")
 def auth_headers():
-    """Auth headers for requests."""
-    return {"Authorization": f"Bearer {TEST_TOKEN}"}
+    """Auth headers for requests (static token, shared read-only across the session)."""
+    return MappingProxyType({"Authorization": f"Bearer {TEST_TOKEN}"})
+
+
+@pytest.fixture(scope="session")
+def json_headers(auth_headers):
+    """Auth headers plus a JSON content type, for posting pre-encoded bodies via content=."""
+    return MappingProxyType({**auth_headers, "Content-Type": "application/json"})
 
 
 @pytest_asyncio.fixture
@@ -65,58 +211,164 @@ async def sample_ingredient(client, auth_headers):
     return response.json()
 
 
+@pytest.fixture
+def withings_settings(monkeypatch):
+    """Configure Withings client credentials and the public base URL for a test."""
+    for name, value in {
+        "withings_client_id": "test_client_id",
+        "withings_client_secret": "test_secret",
+        "base_url": "https://test.example.com",
+    }.items():
+        monkeypatch.setattr(settings, name, value)
+    return settings
+
+
+# Fixed instant that frozen_utcnow pins the Withings token clock to
+FROZEN_NOW = datetime(2024, 6, 15, 12, 0, 0)
+
+
+@pytest.fixture
+def frozen_utcnow(monkeypatch):
+    """Pin withings_service's clock to FROZEN_NOW so token expiry checks are deterministic."""
+    monkeypatch.setattr(withings_service, "_utcnow", lambda: FROZEN_NOW)
+    return FROZEN_NOW
+
+
 @pytest_asyncio.fixture
-async def sample_ingredients(client, auth_headers):
-    """Create multiple sample ingredients."""
-    ingredients_data = [
-        {
-            "name": "Whey Protein",
-            "default_amount": 1,
-            "default_unit": "scoop",
-            "calories": 120,
-            "protein_g": 24,
-            "carbs_g": 3,
-            "fats_g": 1,
-            "sodium_mg": 50,
-        },
-        {
-            "name": "Almond Milk",
-            "default_amount": 1,
-            "default_unit": "cup",
-            "calories": 30,
-            "protein_g": 1,
-            "carbs_g": 1,
-            "fats_g": 2.5,
-            "sodium_mg": 180,
-        },
-        {
-            "name": "Banana",
-            "default_amount": 1,
-            "default_unit": "medium",
-            "calories": 105,
-            "protein_g": 1.3,
-            "carbs_g": 27,
-            "fats_g": 0.4,
-            "sodium_mg": 1,
-        },
-    ]
-    ingredients = []
-    for data in ingredients_data:
-        response = await client.post("/ingredients", json=data, headers=auth_headers)
-        ingredients.append(response.json())
-    return ingredients
+async def valid_tokens(test_db):
+    """Store Withings tokens that stay valid for the next three hours."""
+    expires_at = withings_service._utcnow() + timedelta(hours=3)
+    await withings_service.save_tokens(
+        access_token="valid_access",
+        refresh_token="refresh",
+        expires_at=expires_at,
+    )
+    return expires_at
 
 
 @pytest_asyncio.fixture
-async def sample_recipe(client, auth_headers, sample_ingredients):
-    """Create a sample recipe with items."""
-    data = {
-        "name": "Protein Shake",
-        "items": [
-            {"ingredient_id": sample_ingredients[0]["id"], "amount": 1, "unit": "scoop"},
-            {"ingredient_id": sample_ingredients[1]["id"], "amount": 1.5, "unit": "cup"},
-            {"ingredient_id": sample_ingredients[2]["id"], "amount": 1, "unit": "medium"},
-        ],
+async def expired_tokens(test_db):
+    """Store Withings tokens that expired an hour ago."""
+    expires_at = withings_service._utcnow() - timedelta(hours=1)
+    await withings_service.save_tokens(
+        access_token="old_access",
+        refresh_token="old_refresh",
+        expires_at=expires_at,
+    )
+    return expires_at
+
+
+async def insert_phase(
+    name: str,
+    start_date: str,
+    end_date: str,
+    description: str = "Test",
+    is_recurring: bool = False,
+    recurrence_interval_days: int | None = None,
+) -> int:
+    """Insert a phase row directly (bypassing the API) and return its id."""
+    async with get_db() as db:
+        cursor = await db.execute(
+            """
+            INSERT INTO phases (name, description, start_date, end_date, is_recurring, recurrence_interval_days)
+            VALUES (?, ?, ?, ?, ?, ?)
+            """,
+            (name, description, start_date, end_date, is_recurring, recurrence_interval_days),
+        )
+        await db.commit()
+        return cursor.lastrowid
+
+
+async def insert_supplement(
+    name: str,
+    dosage_amount: float,
+    dosage_unit: str,
+    purpose: str,
+    time_of_day: str,
+    start_date: str,
+    end_date: str | None = None,
+    with_food: bool = False,
+    notes: str | None = None,
+) -> int:
+    """Insert a supplement row directly (bypassing the API) and return its id."""
+    async with get_db() as db:
+        cursor = await db.execute(
+            """
+            INSERT INTO supplements (name, dosage_amount, dosage_unit, purpose, time_of_day, with_food, notes, start_date, end_date)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+            (name, dosage_amount, dosage_unit, purpose, time_of_day, with_food, notes, start_date, end_date),
+        )
+        await db.commit()
+        return cursor.lastrowid
+
+
+async def fetch_row(table: str, column: str, value):
+    """Fetch the first row of table whose column equals value (bypassing the API).
+
+    table and column are test-supplied identifiers; value is bound, so the SQL
+    text stays the same across calls for sqlite3's statement cache.
+    """
+    async with get_db() as db:
+        cursor = await db.execute(f"SELECT * FROM {table} WHERE {column} = ?", (value,))  # nosec B608
+        return await cursor.fetchone()
+
+
+@pytest_asyncio.fixture(scope="session")
+async def sample_data(tmp_path_factory, schema_template):
+    """Seed the sample ingredients and recipe once per session into template databases.
+
+    Tests get their own copy of a template (see sample_ingredients/sample_recipe),
+    so mutations never leak into the next test.
+    """
+    templates = tmp_path_factory.mktemp("sample-data")
+    ingredients_db = str(templates / "ingredients.db")
+    recipe_db = str(templates / "recipe.db")
+
+    copy_db(schema_template, ingredients_db)
+    async with get_db(ingredients_db) as db:
+        await db.executemany(
+            """
+            INSERT INTO ingredients (name, default_amount, default_unit, calories, protein_g, carbs_g, fats_g, sodium_mg)
+            VALUES (:name, :default_amount, :default_unit, :calories, :protein_g, :carbs_g, :fats_g, :sodium_mg)
+            """,
+            SAMPLE_INGREDIENTS,
+        )
+        await db.commit()
+        cursor = await db.execute("SELECT * FROM ingredients ORDER BY id")
+        ingredients = [dict(row) for row in await cursor.fetchall()]
+
+    copy_db(ingredients_db, recipe_db)
+    async with get_db(recipe_db) as db:
+        cursor = await db.execute("INSERT INTO recipes (name) VALUES (?)", ("Protein Shake",))
+        recipe_id = cursor.lastrowid
+        await db.executemany(
+            "INSERT INTO recipe_items (recipe_id, ingredient_id, amount, unit) VALUES (?, ?, ?, ?)",
+            [
+                (recipe_id, ingredient["id"], amount, unit)
+                for ingredient, (amount, unit) in zip(ingredients, SAMPLE_RECIPE_ITEMS)
+            ],
+        )
+        await db.commit()
+    recipe = (await recipe_service.get_recipe(recipe_id, recipe_db)).model_dump(mode="json")
+
+    return {
+        "ingredients_db": ingredients_db,
+        "ingredients": ingredients,
+        "recipe_db": recipe_db,
+        "recipe": recipe,
     }
-    response = await client.post("/recipes", json=data, headers=auth_headers)
-    return response.json()
+
+
+@pytest.fixture
+def sample_ingredients(test_db, sample_data):
+    """Restore the seeded sample ingredients into the test database."""
+    copy_db(sample_data["ingredients_db"], test_db)
+    return copy.deepcopy(sample_data["ingredients"])
+
+
+@pytest.fixture
+def sample_recipe(test_db, sample_data, sample_ingredients):
+    """Restore the seeded sample ingredients and recipe into the test database."""
+    copy_db(sample_data["recipe_db"], test_db)
+    return copy.deepcopy(sample_data["recipe"])
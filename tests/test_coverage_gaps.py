@@ -367,7 +367,6 @@ class TestWithingsHttpErrorHandling:
     async def test_fetch_sleep_invalid_json(self, test_db, monkeypatch):
         """Test handling of invalid JSON response."""
         from app.services import withings_service
-        from unittest.mock import MagicMock
 
         await withings_service.save_tokens(
             access_token="test_token",
@@ -375,8 +374,7 @@ class TestWithingsHttpErrorHandling:
             expires_at=date.today() + timedelta(days=1),
         )
 
-        mock_response = MagicMock()
-        mock_response.json.side_effect = ValueError("Invalid JSON")
+        mock_response = httpx.Response(200, content=b"not json")
 
         with patch("httpx.AsyncClient.post", new_callable=AsyncMock) as mock_post:
             mock_post.return_value = mock_response
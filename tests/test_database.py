@@ -0,0 +1,32 @@
+"""Tests for database connection setup."""
+import pytest
+
+from app.config import settings
+from app.database import init_db, get_db
+
+
+@pytest.mark.asyncio
+async def test_file_database_uses_wal(tmp_path, monkeypatch):
+    """A file database outside fast-write mode is switched to WAL with synchronous=NORMAL."""
+    monkeypatch.setattr(settings, "health_tracker_sqlite_fast_writes", False)
+    db_path = str(tmp_path / "health.db")
+    await init_db(db_path)
+
+    async with get_db(db_path) as db:
+        cursor = await db.execute("PRAGMA journal_mode")
+        assert (await cursor.fetchone())[0] == "wal"
+        cursor = await db.execute("PRAGMA synchronous")
+        assert (await cursor.fetchone())[0] == 1  # NORMAL
+
+
+@pytest.mark.asyncio
+async def test_get_db_reuses_connections_without_leaking_transactions(test_db):
+    """A connection handed back to the pool is reused, minus anything left uncommitted."""
+    async with get_db() as db:
+        first = db
+        await db.execute("INSERT INTO recipes (name) VALUES ('Uncommitted')")
+
+    async with get_db() as db:
+        assert db is first
+        cursor = await db.execute("SELECT COUNT(*) FROM recipes")
+        assert (await cursor.fetchone())[0] == 0
@@ -25,6 +25,26 @@ async def test_create_food(client, auth_headers):
     assert result["calories"] == 140
 
 
+@pytest.mark.asyncio
+async def test_create_foods_bulk(client, auth_headers):
+    """Test logging several food entries in one request."""
+    today = date.today().isoformat()
+    data = [
+        {
+            "date": today, "marker": "bulk", "name": f"Food {i}",
+            "amount": 1, "unit": "x", "calories": 100, "protein_g": 10,
+            "carbs_g": 10, "fats_g": 5, "sodium_mg": 50,
+        }
+        for i in range(3)
+    ]
+    response = await client.post("/foods/bulk", json=data, headers=auth_headers)
+    assert response.status_code == 201
+    assert response.json() == {"created": 3}
+
+    response = await client.get(f"/foods?date={today}&marker=bulk", headers=auth_headers)
+    assert sorted(f["name"] for f in response.json()) == ["Food 0", "Food 1", "Food 2"]
+
+
 @pytest.mark.asyncio
 async def test_create_foods_from_recipe(client, auth_headers, sample_recipe):
     """Test create foods from recipe expands to individual entries."""
@@ -129,12 +149,15 @@ async def test_delete_foods_by_marker(client, auth_headers):
     """Test delete all foods with marker."""
     today = date.today().isoformat()
 
-    for i in range(3):
-        await client.post("/foods", json={
+    response = await client.post("/foods/bulk", json=[
+        {
             "date": today, "marker": "batch_delete", "name": f"Food {i}",
             "amount": 1, "unit": "x", "calories": 100, "protein_g": 10,
             "carbs_g": 10, "fats_g": 5, "sodium_mg": 50,
-        }, headers=auth_headers)
+        }
+        for i in range(3)
+    ], headers=auth_headers)
+    assert response.status_code == 201
 
     response = await client.delete(
         f"/foods/by-marker?date={today}&marker=batch_delete",
@@ -149,12 +172,15 @@ async def test_clear_foods_by_date(client, auth_headers):
     """Test clear all foods for a date."""
     today = date.today().isoformat()
 
-    for i in range(3):
-        await client.post("/foods", json={
+    response = await client.post("/foods/bulk", json=[
+        {
             "date": today, "marker": f"clear_{i}", "name": f"Food {i}",
             "amount": 1, "unit": "x", "calories": 100, "protein_g": 10,
             "carbs_g": 10, "fats_g": 5, "sodium_mg": 50,
-        }, headers=auth_headers)
+        }
+        for i in range(3)
+    ], headers=auth_headers)
+    assert response.status_code == 201
 
     response = await client.delete(f"/foods/clear?date={today}", headers=auth_headers)
     assert response.status_code == 200
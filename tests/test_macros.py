@@ -1,8 +1,9 @@
 import pytest
-from datetime import date
+from datetime import date, timedelta
 
+from app.models.body import BodyMeasurementCreate
 from app.models.food import FoodCreate
-from app.services import food_service, macro_service
+from app.services import body_service, food_service, macro_service
 
 
 @pytest.mark.asyncio
@@ -52,17 +53,21 @@ async def test_remaining_with_suggestion(client, auth_headers):
 @pytest.mark.asyncio
 async def test_get_macro_history(client, auth_headers):
     """Test get macro history."""
-    today = date.today().isoformat()
-
-    await client.post("/foods", json={
-        "date": today, "marker": "history_test", "name": "Test Food",
-        "amount": 1, "unit": "x", "calories": 300, "protein_g": 20,
-        "carbs_g": 30, "fats_g": 10, "sodium_mg": 200,
-    }, headers=auth_headers)
+    today = date.today()
+    week = [today - timedelta(days=i) for i in range(7)]
 
-    await client.post("/body", json={
-        "date": today, "time": "07:00:00", "weight_lbs": 185.0,
-    }, headers=auth_headers)
+    # Seed a week of foods and today's weigh-in directly; only the history read goes over HTTP
+    await food_service.bulk_create_foods([
+        FoodCreate(
+            date=day, marker="history_test", name="Test Food",
+            amount=1, unit="x", calories=300 + i, protein_g=20,
+            carbs_g=30, fats_g=10, sodium_mg=200,
+        )
+        for i, day in enumerate(week)
+    ])
+    await body_service.create_measurement(
+        BodyMeasurementCreate(date=today, time="07:00:00", weight_lbs=185.0)
+    )
 
     response = await client.get("/macros/history?limit=7", headers=auth_headers)
     assert response.status_code == 200
@@ -73,10 +78,14 @@ async def test_get_macro_history(client, auth_headers):
     assert "limit" in result
     assert result["limit"] == 7
 
+    expected_macros = {"protein_g": 20, "carbs_g": 30, "fats_g": 10, "sodium_mg": 200}
+    assert [(d["date"], d["macros"]) for d in result["days"]] == [
+        (day.isoformat(), {"calories": 300 + i, **expected_macros}) for i, day in enumerate(week)
+    ]
+
     today_entry = result["days"][0]
-    assert today_entry["date"] == today
     assert "macros" in today_entry
-    assert "body" in today_entry
+    assert today_entry["body"]["weight_lbs"] == 185.0
 
 
 @pytest.mark.asyncio
@@ -1,15 +1,33 @@
+import asyncio
+
 import pytest
 from datetime import date, timedelta
 
 from app.routers import phases as phases_router
+from app.services import phase_service
+from tests.conftest import insert_phase
+
+# Fixed "today" for the phase service so request bodies and computed
+# is_active/days_remaining values never straddle midnight.
+TODAY = date(2025, 6, 15)
+
+# ISO date strings relative to TODAY, keyed by day offset
+OFFSETS = {n: (TODAY + timedelta(days=n)).isoformat() for n in (-30, -1, 0, 1, 3, 5, 7, 10, 12, 14, 30, 31, 60)}
+
+
+@pytest.fixture(scope="module", autouse=True)
+def frozen_today():
+    """Pin the phase service's current date for every test in this module."""
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr(phase_service, "current_date_in_timezone", lambda tz: TODAY)
+        yield TODAY
 
 
 @pytest.mark.asyncio
 async def test_create_phase(client, auth_headers):
     """Test create phase."""
-    today = date.today()
-    start = today.isoformat()
-    end = (today + timedelta(days=30)).isoformat()
+    start = OFFSETS[0]
+    end = OFFSETS[30]
     data = {
         "name": "Cutting Phase",
         "description": "Caloric deficit for fat loss",
@@ -29,9 +47,8 @@ async def test_create_phase(client, auth_headers):
 @pytest.mark.asyncio
 async def test_create_phase_recurring(client, auth_headers):
     """Test create recurring phase."""
-    today = date.today()
-    start = today.isoformat()
-    end = (today + timedelta(days=7)).isoformat()
+    start = OFFSETS[0]
+    end = OFFSETS[7]
     data = {
         "name": "Fasting Week",
         "description": "Intermittent fasting protocol",
@@ -50,8 +67,8 @@ async def test_create_phase_recurring(client, auth_headers):
 @pytest.mark.asyncio
 async def test_create_phase_past(client, auth_headers):
     """Test create phase in the past (not active)."""
-    past_start = (date.today() - timedelta(days=30)).isoformat()
-    past_end = (date.today() - timedelta(days=1)).isoformat()
+    past_start = OFFSETS[-30]
+    past_end = OFFSETS[-1]
     data = {
         "name": "Past Phase",
         "description": "A completed phase",
@@ -68,14 +85,12 @@ async def test_create_phase_past(client, auth_headers):
 @pytest.mark.asyncio
 async def test_get_phase(client, auth_headers):
     """Test get phase by ID."""
-    today = date.today()
-    response = await client.post("/phases", json={
-        "name": "Test Phase",
-        "description": "Test",
-        "start_date": today.isoformat(),
-        "end_date": (today + timedelta(days=14)).isoformat(),
-    }, headers=auth_headers)
-    phase_id = response.json()["id"]
+    phase_id = await insert_phase(
+        name="Test Phase",
+        description="Test",
+        start_date=OFFSETS[0],
+        end_date=OFFSETS[14],
+    )
 
     response = await client.get(f"/phases/{phase_id}", headers=auth_headers)
     assert response.status_code == 200
@@ -93,19 +108,21 @@ async def test_get_phase_not_found(client, auth_headers):
 @pytest.mark.asyncio
 async def test_list_phases(client, auth_headers):
     """Test list all phases."""
-    today = date.today()
-    await client.post("/phases", json={
-        "name": "Phase 1",
-        "description": "First phase",
-        "start_date": today.isoformat(),
-        "end_date": (today + timedelta(days=30)).isoformat(),
-    }, headers=auth_headers)
-    await client.post("/phases", json={
-        "name": "Phase 2",
-        "description": "Second phase",
-        "start_date": (today + timedelta(days=31)).isoformat(),
-        "end_date": (today + timedelta(days=60)).isoformat(),
-    }, headers=auth_headers)
+    responses = await asyncio.gather(
+        client.post("/phases", json={
+            "name": "Phase 1",
+            "description": "First phase",
+            "start_date": OFFSETS[0],
+            "end_date": OFFSETS[30],
+        }, headers=auth_headers),
+        client.post("/phases", json={
+            "name": "Phase 2",
+            "description": "Second phase",
+            "start_date": OFFSETS[31],
+            "end_date": OFFSETS[60],
+        }, headers=auth_headers),
+    )
+    assert all(r.status_code == 201 for r in responses)
 
     response = await client.get("/phases", headers=auth_headers)
     assert response.status_code == 200
@@ -117,21 +134,23 @@ async def test_list_phases(client, auth_headers):
 @pytest.mark.asyncio
 async def test_list_phases_filter_active(client, auth_headers):
     """Test list phases with active filter."""
-    today = date.today()
-    # Active phase
-    await client.post("/phases", json={
-        "name": "Active Phase",
-        "description": "Currently active",
-        "start_date": today.isoformat(),
-        "end_date": (today + timedelta(days=30)).isoformat(),
-    }, headers=auth_headers)
-    # Inactive phase
-    await client.post("/phases", json={
-        "name": "Inactive Phase",
-        "description": "In the past",
-        "start_date": (today - timedelta(days=30)).isoformat(),
-        "end_date": (today - timedelta(days=1)).isoformat(),
-    }, headers=auth_headers)
+    responses = await asyncio.gather(
+        # Active phase
+        client.post("/phases", json={
+            "name": "Active Phase",
+            "description": "Currently active",
+            "start_date": OFFSETS[0],
+            "end_date": OFFSETS[30],
+        }, headers=auth_headers),
+        # Inactive phase
+        client.post("/phases", json={
+            "name": "Inactive Phase",
+            "description": "In the past",
+            "start_date": OFFSETS[-30],
+            "end_date": OFFSETS[-1],
+        }, headers=auth_headers),
+    )
+    assert all(r.status_code == 201 for r in responses)
 
     response = await client.get("/phases?active=true", headers=auth_headers)
     assert response.status_code == 200
@@ -143,47 +162,51 @@ async def test_list_phases_filter_active(client, auth_headers):
 @pytest.mark.asyncio
 async def test_list_phases_exclude_past(client, auth_headers):
     """Test list phases excluding past phases."""
-    today = date.today()
-    # Future phase
-    await client.post("/phases", json={
-        "name": "Future Phase",
-        "description": "Coming up",
-        "start_date": (today + timedelta(days=1)).isoformat(),
-        "end_date": (today + timedelta(days=30)).isoformat(),
-    }, headers=auth_headers)
-    # Past phase
-    await client.post("/phases", json={
-        "name": "Past Phase",
-        "description": "Already done",
-        "start_date": (today - timedelta(days=30)).isoformat(),
-        "end_date": (today - timedelta(days=1)).isoformat(),
-    }, headers=auth_headers)
+    responses = await asyncio.gather(
+        # Future phase
+        client.post("/phases", json={
+            "name": "Future Phase",
+            "description": "Coming up",
+            "start_date": OFFSETS[1],
+            "end_date": OFFSETS[30],
+        }, headers=auth_headers),
+        # Past phase
+        client.post("/phases", json={
+            "name": "Past Phase",
+            "description": "Already done",
+            "start_date": OFFSETS[-30],
+            "end_date": OFFSETS[-1],
+        }, headers=auth_headers),
+    )
+    assert all(r.status_code == 201 for r in responses)
 
     response = await client.get("/phases?include_past=false", headers=auth_headers)
     assert response.status_code == 200
     result = response.json()
     for phase in result["phases"]:
-        assert phase["end_date"] >= today.isoformat()
+        assert phase["end_date"] >= OFFSETS[0]
 
 
 @pytest.mark.asyncio
 async def test_get_active_phases(client, auth_headers):
     """Test get active phases with upcoming phases."""
-    today = date.today()
-    # Active phase
-    await client.post("/phases", json={
-        "name": "Current Phase",
-        "description": "Active now",
-        "start_date": today.isoformat(),
-        "end_date": (today + timedelta(days=14)).isoformat(),
-    }, headers=auth_headers)
-    # Upcoming phase (within 7 days)
-    await client.post("/phases", json={
-        "name": "Upcoming Phase",
-        "description": "Starting soon",
-        "start_date": (today + timedelta(days=3)).isoformat(),
-        "end_date": (today + timedelta(days=10)).isoformat(),
-    }, headers=auth_headers)
+    responses = await asyncio.gather(
+        # Active phase
+        client.post("/phases", json={
+            "name": "Current Phase",
+            "description": "Active now",
+            "start_date": OFFSETS[0],
+            "end_date": OFFSETS[14],
+        }, headers=auth_headers),
+        # Upcoming phase (within 7 days)
+        client.post("/phases", json={
+            "name": "Upcoming Phase",
+            "description": "Starting soon",
+            "start_date": OFFSETS[3],
+            "end_date": OFFSETS[10],
+        }, headers=auth_headers),
+    )
+    assert all(r.status_code == 201 for r in responses)
 
     response = await client.get("/phases/active", headers=auth_headers)
     assert response.status_code == 200
@@ -202,12 +225,12 @@ async def test_phase_filters_use_profile_timezone(monkeypatch, client, auth_head
     target_today = date(2020, 5, 1)
 
     # Phase that should be considered active relative to target_today
-    await client.post("/phases", json={
-        "name": "TZ Active",
-        "description": "Active in target tz",
-        "start_date": "2020-04-30",
-        "end_date": "2020-05-02",
-    }, headers=auth_headers)
+    await insert_phase(
+        name="TZ Active",
+        description="Active in target tz",
+        start_date="2020-04-30",
+        end_date="2020-05-02",
+    )
 
     monkeypatch.setattr(phases_router.phase_service, "current_date_in_timezone", lambda tz: target_today)
 
@@ -220,14 +243,12 @@ async def test_phase_filters_use_profile_timezone(monkeypatch, client, auth_head
 @pytest.mark.asyncio
 async def test_update_phase(client, auth_headers):
     """Test update phase."""
-    today = date.today()
-    response = await client.post("/phases", json={
-        "name": "Update Test",
-        "description": "Original description",
-        "start_date": today.isoformat(),
-        "end_date": (today + timedelta(days=14)).isoformat(),
-    }, headers=auth_headers)
-    phase_id = response.json()["id"]
+    phase_id = await insert_phase(
+        name="Update Test",
+        description="Original description",
+        start_date=OFFSETS[0],
+        end_date=OFFSETS[14],
+    )
 
     response = await client.put(
         f"/phases/{phase_id}",
@@ -243,16 +264,14 @@ async def test_update_phase(client, auth_headers):
 @pytest.mark.asyncio
 async def test_update_phase_dates(client, auth_headers):
     """Test update phase dates."""
-    today = date.today()
-    response = await client.post("/phases", json={
-        "name": "Date Update Test",
-        "description": "Test",
-        "start_date": today.isoformat(),
-        "end_date": (today + timedelta(days=14)).isoformat(),
-    }, headers=auth_headers)
-    phase_id = response.json()["id"]
+    phase_id = await insert_phase(
+        name="Date Update Test",
+        description="Test",
+        start_date=OFFSETS[0],
+        end_date=OFFSETS[14],
+    )
 
-    new_end = (today + timedelta(days=30)).isoformat()
+    new_end = OFFSETS[30]
     response = await client.put(
         f"/phases/{phase_id}",
         json={"end_date": new_end},
@@ -278,14 +297,12 @@ async def test_update_phase_not_found(client, auth_headers):
 @pytest.mark.asyncio
 async def test_delete_phase(client, auth_headers):
     """Test delete phase."""
-    today = date.today()
-    response = await client.post("/phases", json={
-        "name": "Delete Test",
-        "description": "To be deleted",
-        "start_date": today.isoformat(),
-        "end_date": (today + timedelta(days=7)).isoformat(),
-    }, headers=auth_headers)
-    phase_id = response.json()["id"]
+    phase_id = await insert_phase(
+        name="Delete Test",
+        description="To be deleted",
+        start_date=OFFSETS[0],
+        end_date=OFFSETS[7],
+    )
 
     response = await client.delete(f"/phases/{phase_id}", headers=auth_headers)
     assert response.status_code == 204
@@ -304,13 +321,12 @@ async def test_delete_phase_not_found(client, auth_headers):
 @pytest.mark.asyncio
 async def test_phase_days_remaining_calculation(client, auth_headers):
     """Test that days_remaining is correctly calculated."""
-    today = date.today()
     days_ahead = 10
     response = await client.post("/phases", json={
         "name": "Days Test",
         "description": "Testing days_remaining",
-        "start_date": today.isoformat(),
-        "end_date": (today + timedelta(days=days_ahead)).isoformat(),
+        "start_date": OFFSETS[0],
+        "end_date": OFFSETS[days_ahead],
     }, headers=auth_headers)
     assert response.status_code == 201
     result = response.json()
@@ -320,14 +336,13 @@ async def test_phase_days_remaining_calculation(client, auth_headers):
 @pytest.mark.asyncio
 async def test_upcoming_phase_days_until_start(client, auth_headers):
     """Test that days_until_start is correctly calculated for upcoming phases."""
-    today = date.today()
     days_ahead = 5
-    await client.post("/phases", json={
-        "name": "Upcoming Test",
-        "description": "Testing days_until_start",
-        "start_date": (today + timedelta(days=days_ahead)).isoformat(),
-        "end_date": (today + timedelta(days=days_ahead + 7)).isoformat(),
-    }, headers=auth_headers)
+    await insert_phase(
+        name="Upcoming Test",
+        description="Testing days_until_start",
+        start_date=OFFSETS[days_ahead],
+        end_date=OFFSETS[days_ahead + 7],
+    )
 
     response = await client.get("/phases/active", headers=auth_headers)
     assert response.status_code == 200
@@ -19,6 +19,23 @@ async def test_create_recipe(client, auth_headers, sample_ingredients):
     assert result["totals"]["protein_g"] == 48
 
 
+@pytest.mark.asyncio
+async def test_create_recipe_with_multiple_items(client, auth_headers, sample_ingredients):
+    """Test create recipe inserts every item in order."""
+    data = {
+        "name": "Multi Item Recipe",
+        "items": [
+            {"ingredient_id": ingredient["id"], "amount": ingredient["default_amount"], "unit": ingredient["default_unit"]}
+            for ingredient in sample_ingredients
+        ],
+    }
+    response = await client.post("/recipes", json=data, headers=auth_headers)
+    assert response.status_code == 201
+    result = response.json()
+    assert [item["ingredient_name"] for item in result["items"]] == [i["name"] for i in sample_ingredients]
+    assert result["totals"]["calories"] == sum(i["calories"] for i in sample_ingredients)
+
+
 @pytest.mark.asyncio
 async def test_get_recipe(client, auth_headers, sample_recipe):
     """Test get recipe by ID."""
@@ -4,18 +4,41 @@ from datetime import date
 
 import pytest
 
-from app.database import get_db, init_db
+from app.database import get_db
 from app.models.food import FoodCreate, FoodUpdate
 from app.services import food_service
-from app.services.snapshot_service import get_or_create_snapshot, compute_snapshot
+from app.services.snapshot_service import generate_missing_snapshots, get_or_create_snapshot, compute_snapshot
 
 
 @pytest.fixture
-async def test_db(tmp_path):
-    """Create a temporary test database."""
-    db_path = str(tmp_path / "test.db")
-    await init_db(db_path)
-    yield db_path
+async def db_conn(test_db):
+    """Hold one connection open for a test's snapshot cache assertions."""
+    async with get_db(test_db) as db:
+        yield db
+
+
+async def snapshot_exists(db, snapshot_date: date) -> bool:
+    """Return whether a snapshot for snapshot_date is currently cached."""
+    async with db.execute(
+        "SELECT EXISTS(SELECT 1 FROM daily_snapshots WHERE date = ?)",
+        (snapshot_date.isoformat(),),
+    ) as cursor:
+        return bool((await cursor.fetchone())[0])
+
+
+# Validated once; make_food copies it with overrides instead of re-validating every field
+_FOOD_PROTO = FoodCreate(
+    date=date(2000, 1, 1),
+    marker="lunch",
+    name="Test Food",
+    amount=1.0,
+    unit="serving",
+    calories=100,
+    protein_g=10,
+    carbs_g=10,
+    fats_g=5,
+    sodium_mg=50,
+)
 
 
 def make_food(
@@ -29,24 +52,22 @@ def make_food(
     sodium_mg: int = 50,
 ) -> FoodCreate:
     """Helper to create FoodCreate with all required fields."""
-    return FoodCreate(
-        date=food_date,
-        marker=marker,
-        name=name,
-        amount=1.0,
-        unit="serving",
-        calories=calories,
-        protein_g=protein_g,
-        carbs_g=carbs_g,
-        fats_g=fats_g,
-        sodium_mg=sodium_mg,
-    )
+    return _FOOD_PROTO.model_copy(update={
+        "date": food_date,
+        "name": name,
+        "marker": marker,
+        "calories": calories,
+        "protein_g": protein_g,
+        "carbs_g": carbs_g,
+        "fats_g": fats_g,
+        "sodium_mg": sodium_mg,
+    })
 
 
 class TestSnapshotInvalidationOnCreate:
     """Test that creating food invalidates cached snapshots."""
 
-    async def test_create_food_invalidates_snapshot(self, test_db):
+    async def test_create_food_invalidates_snapshot(self, test_db, db_conn):
         """Creating food should invalidate any cached snapshot for that date."""
         test_date = date(2025, 1, 15)
 
@@ -55,33 +76,21 @@ class TestSnapshotInvalidationOnCreate:
         assert snapshot1.calories == 0
 
         # Verify it's cached
-        async with get_db(test_db) as db:
-            cursor = await db.execute(
-                "SELECT * FROM daily_snapshots WHERE date = ?",
-                (test_date.isoformat(),)
-            )
-            cached = await cursor.fetchone()
-            assert cached is not None
+        assert await snapshot_exists(db_conn, test_date)
 
         # Create a food entry
         food = make_food(test_date, calories=500, protein_g=30, carbs_g=40, fats_g=20, sodium_mg=100)
         await food_service.create_food(food, test_db)
 
         # Verify the cache was invalidated
-        async with get_db(test_db) as db:
-            cursor = await db.execute(
-                "SELECT * FROM daily_snapshots WHERE date = ?",
-                (test_date.isoformat(),)
-            )
-            cached = await cursor.fetchone()
-            assert cached is None, "Snapshot cache should be invalidated after creating food"
+        assert not await snapshot_exists(db_conn, test_date), "Snapshot cache should be invalidated after creating food"
 
         # Get snapshot again - should now show the food
         snapshot2 = await get_or_create_snapshot(test_date, test_db)
         assert snapshot2.calories == 500
         assert snapshot2.protein_g == 30
 
-    async def test_create_food_only_invalidates_its_date(self, test_db):
+    async def test_create_food_only_invalidates_its_date(self, test_db, db_conn):
         """Creating food should only invalidate the snapshot for that specific date."""
         date1 = date(2025, 1, 15)
         date2 = date(2025, 1, 16)
@@ -94,26 +103,39 @@ class TestSnapshotInvalidationOnCreate:
         food = make_food(date1, calories=500)
         await food_service.create_food(food, test_db)
 
-        # date1 cache should be invalidated
-        async with get_db(test_db) as db:
-            cursor = await db.execute(
-                "SELECT * FROM daily_snapshots WHERE date = ?",
-                (date1.isoformat(),)
-            )
-            assert await cursor.fetchone() is None
+        # date1 cache should be invalidated, date2 cache should still exist
+        async with db_conn.execute(
+            "SELECT date FROM daily_snapshots WHERE date IN (?, ?)",
+            (date1.isoformat(), date2.isoformat()),
+        ) as cursor:
+            cached = {row["date"] for row in await cursor.fetchall()}
+        assert cached == {date2.isoformat()}
 
-            # date2 cache should still exist
-            cursor = await db.execute(
-                "SELECT * FROM daily_snapshots WHERE date = ?",
-                (date2.isoformat(),)
-            )
-            assert await cursor.fetchone() is not None
+    async def test_bulk_create_invalidates_each_date(self, test_db, db_conn):
+        """Bulk-creating foods should invalidate the snapshot of every affected date."""
+        date1 = date(2025, 1, 15)
+        date2 = date(2025, 1, 16)
+
+        await get_or_create_snapshot(date1, test_db)
+        await get_or_create_snapshot(date2, test_db)
+
+        count = await food_service.bulk_create_foods(
+            [make_food(date1, calories=200), make_food(date1, calories=300), make_food(date2, calories=400)],
+            test_db,
+        )
+        assert count == 3
+
+        assert not await snapshot_exists(db_conn, date1)
+        assert not await snapshot_exists(db_conn, date2)
+
+        assert (await get_or_create_snapshot(date1, test_db)).calories == 500
+        assert (await get_or_create_snapshot(date2, test_db)).calories == 400
 
 
 class TestSnapshotInvalidationOnUpdate:
     """Test that updating food invalidates cached snapshots."""
 
-    async def test_update_food_invalidates_snapshot(self, test_db):
+    async def test_update_food_invalidates_snapshot(self, test_db, db_conn):
         """Updating food should invalidate the cached snapshot."""
         test_date = date(2025, 1, 15)
 
@@ -130,12 +152,7 @@ class TestSnapshotInvalidationOnUpdate:
         await food_service.update_food(created.id, update, test_db)
 
         # Cache should be invalidated
-        async with get_db(test_db) as db:
-            cursor = await db.execute(
-                "SELECT * FROM daily_snapshots WHERE date = ?",
-                (test_date.isoformat(),)
-            )
-            assert await cursor.fetchone() is None
+        assert not await snapshot_exists(db_conn, test_date)
 
         # New snapshot should reflect the update
         snapshot2 = await get_or_create_snapshot(test_date, test_db)
@@ -145,7 +162,7 @@ class TestSnapshotInvalidationOnUpdate:
 class TestSnapshotInvalidationOnDelete:
     """Test that deleting food invalidates cached snapshots."""
 
-    async def test_delete_food_invalidates_snapshot(self, test_db):
+    async def test_delete_food_invalidates_snapshot(self, test_db, db_conn):
         """Deleting food should invalidate the cached snapshot."""
         test_date = date(2025, 1, 15)
 
@@ -161,25 +178,21 @@ class TestSnapshotInvalidationOnDelete:
         await food_service.delete_food(created.id, test_db)
 
         # Cache should be invalidated
-        async with get_db(test_db) as db:
-            cursor = await db.execute(
-                "SELECT * FROM daily_snapshots WHERE date = ?",
-                (test_date.isoformat(),)
-            )
-            assert await cursor.fetchone() is None
+        assert not await snapshot_exists(db_conn, test_date)
 
         # New snapshot should show 0
         snapshot2 = await get_or_create_snapshot(test_date, test_db)
         assert snapshot2.calories == 0
 
-    async def test_delete_by_marker_invalidates_snapshot(self, test_db):
+    async def test_delete_by_marker_invalidates_snapshot(self, test_db, db_conn):
         """Deleting foods by marker should invalidate the cached snapshot."""
         test_date = date(2025, 1, 15)
 
         # Create foods with marker
-        for i in range(3):
-            food = make_food(test_date, name=f"Test Food {i}", marker="lunch", calories=100)
-            await food_service.create_food(food, test_db)
+        await food_service.bulk_create_foods(
+            [make_food(test_date, name=f"Test Food {i}", marker="lunch", calories=100) for i in range(3)],
+            test_db,
+        )
 
         # Create cached snapshot
         snapshot1 = await get_or_create_snapshot(test_date, test_db)
@@ -189,25 +202,21 @@ class TestSnapshotInvalidationOnDelete:
         await food_service.delete_foods_by_marker(test_date, "lunch", test_db)
 
         # Cache should be invalidated
-        async with get_db(test_db) as db:
-            cursor = await db.execute(
-                "SELECT * FROM daily_snapshots WHERE date = ?",
-                (test_date.isoformat(),)
-            )
-            assert await cursor.fetchone() is None
+        assert not await snapshot_exists(db_conn, test_date)
 
         # New snapshot should show 0
         snapshot2 = await get_or_create_snapshot(test_date, test_db)
         assert snapshot2.calories == 0
 
-    async def test_clear_foods_by_date_invalidates_snapshot(self, test_db):
+    async def test_clear_foods_by_date_invalidates_snapshot(self, test_db, db_conn):
         """Clearing all foods for a date should invalidate the cached snapshot."""
         test_date = date(2025, 1, 15)
 
         # Create multiple foods
-        for i in range(3):
-            food = make_food(test_date, name=f"Test Food {i}", calories=100)
-            await food_service.create_food(food, test_db)
+        await food_service.bulk_create_foods(
+            [make_food(test_date, name=f"Test Food {i}", calories=100) for i in range(3)],
+            test_db,
+        )
 
         # Create cached snapshot
         snapshot1 = await get_or_create_snapshot(test_date, test_db)
@@ -217,12 +226,7 @@ class TestSnapshotInvalidationOnDelete:
         await food_service.clear_foods_by_date(test_date, test_db)
 
         # Cache should be invalidated
-        async with get_db(test_db) as db:
-            cursor = await db.execute(
-                "SELECT * FROM daily_snapshots WHERE date = ?",
-                (test_date.isoformat(),)
-            )
-            assert await cursor.fetchone() is None
+        assert not await snapshot_exists(db_conn, test_date)
 
         # New snapshot should show 0
         snapshot2 = await get_or_create_snapshot(test_date, test_db)
@@ -232,7 +236,7 @@ class TestSnapshotInvalidationOnDelete:
 class TestSnapshotInvalidationNoOp:
     """Test that operations that don't change data don't unnecessarily invalidate."""
 
-    async def test_delete_by_marker_no_matches_no_invalidation(self, test_db):
+    async def test_delete_by_marker_no_matches_no_invalidation(self, test_db, db_conn):
         """Deleting by marker with no matches should not invalidate cache."""
         test_date = date(2025, 1, 15)
 
@@ -247,14 +251,9 @@ class TestSnapshotInvalidationNoOp:
         await food_service.delete_foods_by_marker(test_date, "nonexistent", test_db)
 
         # Cache should still exist (no actual deletion occurred)
-        async with get_db(test_db) as db:
-            cursor = await db.execute(
-                "SELECT * FROM daily_snapshots WHERE date = ?",
-                (test_date.isoformat(),)
-            )
-            assert await cursor.fetchone() is not None
-
-    async def test_clear_empty_date_no_invalidation(self, test_db):
+        assert await snapshot_exists(db_conn, test_date)
+
+    async def test_clear_empty_date_no_invalidation(self, test_db, db_conn):
         """Clearing a date with no foods should not invalidate cache."""
         test_date = date(2025, 1, 15)
 
@@ -265,12 +264,7 @@ class TestSnapshotInvalidationNoOp:
         await food_service.clear_foods_by_date(test_date, test_db)
 
         # Cache should still exist
-        async with get_db(test_db) as db:
-            cursor = await db.execute(
-                "SELECT * FROM daily_snapshots WHERE date = ?",
-                (test_date.isoformat(),)
-            )
-            assert await cursor.fetchone() is not None
+        assert await snapshot_exists(db_conn, test_date)
 
 
 class TestSnapshotCorrectness:
@@ -287,18 +281,22 @@ class TestSnapshotCorrectness:
             {"calories": 250, "protein_g": 20, "carbs_g": 35, "fats_g": 8, "sodium_mg": 150},
         ]
 
-        for i, data in enumerate(foods_data):
-            food = make_food(test_date, name=f"Food {i}", **data)
-            await food_service.create_food(food, test_db)
+        await food_service.bulk_create_foods(
+            [make_food(test_date, name=f"Food {i}", **data) for i, data in enumerate(foods_data)],
+            test_db,
+        )
 
         # Get snapshot
         snapshot = await get_or_create_snapshot(test_date, test_db)
 
-        assert snapshot.calories == 1000  # 300 + 450 + 250
-        assert snapshot.protein_g == 80  # 25 + 35 + 20
-        assert snapshot.carbs_g == 85  # 30 + 20 + 35
-        assert snapshot.fats_g == 43  # 10 + 25 + 8
-        assert snapshot.sodium_mg == 700  # 200 + 350 + 150
+        # Every field checked in one comparison; a mismatch diff shows them all
+        assert snapshot.model_dump() == {
+            "calories": 1000,  # 300 + 450 + 250
+            "protein_g": 80,  # 25 + 35 + 20
+            "carbs_g": 85,  # 30 + 20 + 35
+            "fats_g": 43,  # 10 + 25 + 8
+            "sodium_mg": 700,  # 200 + 350 + 150
+        }
 
     async def test_snapshot_updates_after_partial_delete(self, test_db):
         """Snapshot should update correctly after deleting some foods."""
@@ -325,3 +323,25 @@ class TestSnapshotCorrectness:
         snapshot2 = await get_or_create_snapshot(test_date, test_db)
         assert snapshot2.calories == 200
         assert snapshot2.protein_g == 15
+
+    async def test_generate_missing_snapshots_matches_per_day(self, test_db, db_conn):
+        """Range generation should agree with per-day snapshots and cache every date."""
+        date1 = date(2025, 1, 15)
+        date2 = date(2025, 1, 16)
+        date3 = date(2025, 1, 17)
+
+        await food_service.bulk_create_foods(
+            [make_food(date1, calories=300, protein_g=12.34), make_food(date3, calories=150)],
+            test_db,
+        )
+        # date1 is already cached; date2 (no foods) and date3 are not
+        cached = await get_or_create_snapshot(date1, test_db)
+
+        snapshots = await generate_missing_snapshots(date1, date3, test_db)
+
+        assert list(snapshots) == [date1, date2, date3]
+        assert snapshots[date1] == cached
+        assert snapshots[date2].calories == 0
+        assert snapshots[date3] == await compute_snapshot(date3, test_db)
+        for day in (date2, date3):
+            assert await snapshot_exists(db_conn, day)
@@ -1,11 +1,33 @@
+import orjson
 import pytest
 from datetime import date, timedelta
 
+from tests.conftest import insert_supplement, json_body
 
-@pytest.mark.asyncio
-async def test_create_supplement(client, auth_headers):
+# Supplement activity is computed against the real date.today(), so these are
+# evaluated once at import rather than per test.
+TODAY = date.today()
+OFFSETS = {n: (TODAY + timedelta(days=n)).isoformat() for n in (-30, -10, -1, 0)}
+
+# Required fields shared by the throwaway supplements in this module
+MIN_SUPPLEMENT = {
+    "dosage_amount": 100,
+    "dosage_unit": "mg",
+    "purpose": "Test",
+    "time_of_day": "morning",
+    "start_date": OFFSETS[0],
+}
+
+
+@pytest.fixture
+async def seed_supplements(request, test_db):
+    """Insert the parametrized supplement rows directly, bypassing the API."""
+    for supplement in request.param:
+        await insert_supplement(**supplement)
+
+
+async def test_create_supplement(client, json_headers):
     """Test create supplement."""
-    today = date.today().isoformat()
     data = {
         "name": "Vitamin D3",
         "dosage_amount": 5000,
@@ -14,11 +36,11 @@ async def test_create_supplement(client, auth_headers):
         "time_of_day": "morning",
         "with_food": True,
         "notes": "Take with fatty meal for better absorption",
-        "start_date": today,
+        "start_date": OFFSETS[0],
     }
-    response = await client.post("/supplements", json=data, headers=auth_headers)
+    response = await client.post("/supplements", content=orjson.dumps(data), headers=json_headers)
     assert response.status_code == 201
-    result = response.json()
+    result = json_body(response)
     assert result["name"] == "Vitamin D3"
     assert result["dosage_amount"] == 5000
     assert result["dosage_unit"] == "IU"
@@ -28,21 +50,19 @@ async def test_create_supplement(client, auth_headers):
     assert result["is_active"] is True
 
 
-@pytest.mark.asyncio
-async def test_create_supplement_minimal(client, auth_headers):
+async def test_create_supplement_minimal(client, json_headers):
     """Test create supplement with minimal fields."""
-    today = date.today().isoformat()
     data = {
         "name": "Fish Oil",
         "dosage_amount": 1000,
         "dosage_unit": "mg",
         "purpose": "Omega-3",
         "time_of_day": "evening",
-        "start_date": today,
+        "start_date": OFFSETS[0],
     }
-    response = await client.post("/supplements", json=data, headers=auth_headers)
+    response = await client.post("/supplements", content=orjson.dumps(data), headers=json_headers)
     assert response.status_code == 201
-    result = response.json()
+    result = json_body(response)
     assert result["name"] == "Fish Oil"
     assert result["dosage_display"] == "1K mg"
     assert result["with_food"] is False
@@ -50,11 +70,10 @@ async def test_create_supplement_minimal(client, auth_headers):
     assert result["end_date"] is None
 
 
-@pytest.mark.asyncio
-async def test_create_supplement_with_end_date(client, auth_headers):
+async def test_create_supplement_with_end_date(client, json_headers):
     """Test create supplement with end date (not active after end)."""
-    past_start = (date.today() - timedelta(days=30)).isoformat()
-    past_end = (date.today() - timedelta(days=1)).isoformat()
+    past_start = OFFSETS[-30]
+    past_end = OFFSETS[-1]
     data = {
         "name": "Antibiotic",
         "dosage_amount": 500,
@@ -64,52 +83,46 @@ async def test_create_supplement_with_end_date(client, auth_headers):
         "start_date": past_start,
         "end_date": past_end,
     }
-    response = await client.post("/supplements", json=data, headers=auth_headers)
+    response = await client.post("/supplements", content=orjson.dumps(data), headers=json_headers)
     assert response.status_code == 201
-    result = response.json()
+    result = json_body(response)
     assert result["is_active"] is False
 
 
-@pytest.mark.asyncio
-async def test_create_supplement_large_amount(client, auth_headers):
+async def test_create_supplement_large_amount(client, json_headers):
     """Test create supplement with large amount (e.g., probiotics)."""
-    today = date.today().isoformat()
     data = {
         "name": "Probiotic",
         "dosage_amount": 10_000_000_000,  # 10 billion CFU
         "dosage_unit": "CFU",
         "purpose": "Gut health",
         "time_of_day": "morning",
-        "start_date": today,
+        "start_date": OFFSETS[0],
     }
-    response = await client.post("/supplements", json=data, headers=auth_headers)
+    response = await client.post("/supplements", content=orjson.dumps(data), headers=json_headers)
     assert response.status_code == 201
-    result = response.json()
+    result = json_body(response)
     assert result["dosage_display"] == "10B CFU"
 
 
-@pytest.mark.asyncio
-async def test_create_supplement_small_amount(client, auth_headers):
+async def test_create_supplement_small_amount(client, json_headers):
     """Test create supplement with small amount."""
-    today = date.today().isoformat()
     data = {
         "name": "Selenium",
         "dosage_amount": 200,
         "dosage_unit": "mcg",
         "purpose": "Thyroid support",
         "time_of_day": "morning",
-        "start_date": today,
+        "start_date": OFFSETS[0],
     }
-    response = await client.post("/supplements", json=data, headers=auth_headers)
+    response = await client.post("/supplements", content=orjson.dumps(data), headers=json_headers)
     assert response.status_code == 201
-    result = response.json()
+    result = json_body(response)
     assert result["dosage_display"] == "200 mcg"
 
 
-@pytest.mark.asyncio
-async def test_create_supplement_fractional_amount(client, auth_headers):
+async def test_create_supplement_fractional_amount(client, json_headers):
     """Test create supplement with fractional amount."""
-    today = date.today().isoformat()
     data = {
         "name": "Cod Liver Oil",
         "dosage_amount": 1.5,
@@ -117,177 +130,111 @@ async def test_create_supplement_fractional_amount(client, auth_headers):
         "purpose": "Vitamins A & D",
         "time_of_day": "morning",
         "with_food": True,
-        "start_date": today,
+        "start_date": OFFSETS[0],
     }
-    response = await client.post("/supplements", json=data, headers=auth_headers)
+    response = await client.post("/supplements", content=orjson.dumps(data), headers=json_headers)
     assert response.status_code == 201
-    result = response.json()
+    result = json_body(response)
     assert result["dosage_display"] == "1.5 tbsp"
 
 
-@pytest.mark.asyncio
 async def test_get_supplement(client, auth_headers):
     """Test get supplement by ID."""
-    today = date.today().isoformat()
-    response = await client.post("/supplements", json={
-        "name": "Magnesium",
-        "dosage_amount": 400,
-        "dosage_unit": "mg",
-        "purpose": "Sleep support",
-        "time_of_day": "bedtime",
-        "start_date": today,
-    }, headers=auth_headers)
-    supplement_id = response.json()["id"]
+    supplement_id = await insert_supplement(
+        name="Magnesium",
+        dosage_amount=400,
+        dosage_unit="mg",
+        purpose="Sleep support",
+        time_of_day="bedtime",
+        start_date=OFFSETS[0],
+    )
 
     response = await client.get(f"/supplements/{supplement_id}", headers=auth_headers)
     assert response.status_code == 200
-    result = response.json()
+    result = json_body(response)
     assert result["name"] == "Magnesium"
     assert result["dosage_display"] == "400 mg"
 
 
-@pytest.mark.asyncio
 async def test_get_supplement_not_found(client, auth_headers):
     """Test get supplement that doesn't exist."""
     response = await client.get("/supplements/99999", headers=auth_headers)
     assert response.status_code == 404
 
 
-@pytest.mark.asyncio
-async def test_list_supplements(client, auth_headers):
-    """Test list all supplements."""
-    today = date.today().isoformat()
-    await client.post("/supplements", json={
+@pytest.mark.parametrize("seed_supplements", [[
+    {
         "name": "Vitamin C",
         "dosage_amount": 1000,
         "dosage_unit": "mg",
         "purpose": "Immune support",
         "time_of_day": "morning",
-        "start_date": today,
-    }, headers=auth_headers)
-    await client.post("/supplements", json={
+        "start_date": OFFSETS[0],
+    },
+    {
         "name": "Zinc",
         "dosage_amount": 30,
         "dosage_unit": "mg",
         "purpose": "Immune support",
         "time_of_day": "evening",
-        "start_date": today,
-    }, headers=auth_headers)
-
+        "start_date": OFFSETS[0],
+    },
+]], indirect=True)
+async def test_list_supplements(client, auth_headers, seed_supplements):
+    """Test list all supplements."""
     response = await client.get("/supplements", headers=auth_headers)
     assert response.status_code == 200
-    result = response.json()
+    result = json_body(response)
     assert "supplements" in result
     assert len(result["supplements"]) >= 2
 
 
-@pytest.mark.asyncio
-async def test_list_supplements_filter_active(client, auth_headers):
-    """Test list supplements with active filter."""
-    today = date.today().isoformat()
-    past_end = (date.today() - timedelta(days=1)).isoformat()
-    past_start = (date.today() - timedelta(days=10)).isoformat()
-
+@pytest.mark.parametrize("seed_supplements", [[
     # Active supplement
-    await client.post("/supplements", json={
-        "name": "Active Supp",
-        "dosage_amount": 100,
-        "dosage_unit": "mg",
-        "purpose": "Test",
-        "time_of_day": "morning",
-        "start_date": today,
-    }, headers=auth_headers)
+    MIN_SUPPLEMENT | {"name": "Active Supp"},
     # Inactive supplement
-    await client.post("/supplements", json={
-        "name": "Inactive Supp",
-        "dosage_amount": 100,
-        "dosage_unit": "mg",
-        "purpose": "Test",
-        "time_of_day": "morning",
-        "start_date": past_start,
-        "end_date": past_end,
-    }, headers=auth_headers)
-
+    MIN_SUPPLEMENT | {"name": "Inactive Supp", "start_date": OFFSETS[-10], "end_date": OFFSETS[-1]},
+]], indirect=True)
+async def test_list_supplements_filter_active(client, auth_headers, seed_supplements):
+    """Test list supplements with active filter."""
     response = await client.get("/supplements?active=true", headers=auth_headers)
     assert response.status_code == 200
-    result = response.json()
-    for supp in result["supplements"]:
-        assert supp["is_active"] is True
+    result = json_body(response)
+    assert all(supp["is_active"] is True for supp in result["supplements"])
 
 
-@pytest.mark.asyncio
-async def test_list_supplements_filter_time_of_day(client, auth_headers):
+@pytest.mark.parametrize("seed_supplements", [[
+    MIN_SUPPLEMENT | {"name": "Morning Supp"},
+    MIN_SUPPLEMENT | {"name": "Bedtime Supp", "time_of_day": "bedtime"},
+]], indirect=True)
+async def test_list_supplements_filter_time_of_day(client, auth_headers, seed_supplements):
     """Test list supplements filtered by time of day."""
-    today = date.today().isoformat()
-    await client.post("/supplements", json={
-        "name": "Morning Supp",
-        "dosage_amount": 100,
-        "dosage_unit": "mg",
-        "purpose": "Test",
-        "time_of_day": "morning",
-        "start_date": today,
-    }, headers=auth_headers)
-    await client.post("/supplements", json={
-        "name": "Bedtime Supp",
-        "dosage_amount": 100,
-        "dosage_unit": "mg",
-        "purpose": "Test",
-        "time_of_day": "bedtime",
-        "start_date": today,
-    }, headers=auth_headers)
-
     response = await client.get("/supplements?time_of_day=morning", headers=auth_headers)
     assert response.status_code == 200
-    result = response.json()
-    for supp in result["supplements"]:
-        assert supp["time_of_day"] == "morning"
+    result = json_body(response)
+    assert {supp["time_of_day"] for supp in result["supplements"]} <= {"morning"}
 
 
-@pytest.mark.asyncio
-async def test_get_active_supplements(client, auth_headers):
+async def test_get_active_supplements(client, auth_headers, json_headers):
     """Test get active supplements endpoint."""
-    today = date.today().isoformat()
-    await client.post("/supplements", json={
-        "name": "Active Test",
-        "dosage_amount": 100,
-        "dosage_unit": "mg",
-        "purpose": "Test",
-        "time_of_day": "morning",
-        "start_date": today,
-    }, headers=auth_headers)
+    await client.post("/supplements", content=orjson.dumps(MIN_SUPPLEMENT | {"name": "Active Test"}), headers=json_headers)
 
     response = await client.get("/supplements/active", headers=auth_headers)
     assert response.status_code == 200
-    result = response.json()
+    result = json_body(response)
     assert "supplements" in result
-    for supp in result["supplements"]:
-        assert supp["is_active"] is True
+    assert all(supp["is_active"] is True for supp in result["supplements"])
 
 
-@pytest.mark.asyncio
-async def test_get_supplement_schedule(client, auth_headers):
+@pytest.mark.parametrize("seed_supplements", [[
+    MIN_SUPPLEMENT | {"name": "Morning Vitamin"},
+    MIN_SUPPLEMENT | {"name": "Bedtime Mineral", "dosage_amount": 200, "time_of_day": "bedtime"},
+]], indirect=True)
+async def test_get_supplement_schedule(client, auth_headers, seed_supplements):
     """Test get supplement schedule organized by time of day."""
-    today = date.today().isoformat()
-    await client.post("/supplements", json={
-        "name": "Morning Vitamin",
-        "dosage_amount": 100,
-        "dosage_unit": "mg",
-        "purpose": "Test",
-        "time_of_day": "morning",
-        "start_date": today,
-    }, headers=auth_headers)
-    await client.post("/supplements", json={
-        "name": "Bedtime Mineral",
-        "dosage_amount": 200,
-        "dosage_unit": "mg",
-        "purpose": "Test",
-        "time_of_day": "bedtime",
-        "start_date": today,
-    }, headers=auth_headers)
-
     response = await client.get("/supplements/schedule", headers=auth_headers)
     assert response.status_code == 200
-    result = response.json()
+    result = json_body(response)
     assert "date" in result
     assert "schedule" in result
     assert "morning" in result["schedule"]
@@ -296,83 +243,53 @@ async def test_get_supplement_schedule(client, auth_headers):
     assert "total_supplements" in result["summary"]
 
 
-@pytest.mark.asyncio
-async def test_get_supplement_history(client, auth_headers):
+async def test_get_supplement_history(client, auth_headers, json_headers):
     """Test get supplement history for date range."""
-    today = date.today()
-    start = (today - timedelta(days=30)).isoformat()
-    end = today.isoformat()
+    start = OFFSETS[-30]
+    end = OFFSETS[0]
 
-    await client.post("/supplements", json={
-        "name": "History Test",
-        "dosage_amount": 100,
-        "dosage_unit": "mg",
-        "purpose": "Test",
-        "time_of_day": "morning",
-        "start_date": start,
-    }, headers=auth_headers)
+    await client.post("/supplements", content=orjson.dumps(MIN_SUPPLEMENT | {"name": "History Test", "start_date": start}), headers=json_headers)
 
     response = await client.get(
         f"/supplements/history?start_date={start}&end_date={end}",
         headers=auth_headers,
     )
     assert response.status_code == 200
-    result = response.json()
+    result = json_body(response)
     assert "supplements" in result
     assert "start_date" in result
     assert "end_date" in result
 
 
-@pytest.mark.asyncio
-async def test_update_supplement(client, auth_headers):
+async def test_update_supplement(client, json_headers):
     """Test update supplement."""
-    today = date.today().isoformat()
-    response = await client.post("/supplements", json={
-        "name": "Update Test",
-        "dosage_amount": 100,
-        "dosage_unit": "mg",
-        "purpose": "Test",
-        "time_of_day": "morning",
-        "start_date": today,
-    }, headers=auth_headers)
-    supplement_id = response.json()["id"]
+    supplement_id = await insert_supplement(**MIN_SUPPLEMENT, name="Update Test")
 
     response = await client.put(
         f"/supplements/{supplement_id}",
-        json={"dosage_amount": 200, "notes": "Updated dose"},
-        headers=auth_headers,
+        content=orjson.dumps({"dosage_amount": 200, "notes": "Updated dose"}),
+        headers=json_headers,
     )
     assert response.status_code == 200
-    result = response.json()
+    result = json_body(response)
     assert result["dosage_amount"] == 200
     assert result["dosage_display"] == "200 mg"
     assert result["notes"] == "Updated dose"
 
 
-@pytest.mark.asyncio
-async def test_update_supplement_not_found(client, auth_headers):
+async def test_update_supplement_not_found(client, json_headers):
     """Test update supplement that doesn't exist."""
     response = await client.put(
         "/supplements/99999",
-        json={"dosage_amount": 200},
-        headers=auth_headers,
+        content=orjson.dumps({"dosage_amount": 200}),
+        headers=json_headers,
     )
     assert response.status_code == 404
 
 
-@pytest.mark.asyncio
 async def test_delete_supplement(client, auth_headers):
     """Test delete supplement."""
-    today = date.today().isoformat()
-    response = await client.post("/supplements", json={
-        "name": "Delete Test",
-        "dosage_amount": 100,
-        "dosage_unit": "mg",
-        "purpose": "Test",
-        "time_of_day": "morning",
-        "start_date": today,
-    }, headers=auth_headers)
-    supplement_id = response.json()["id"]
+    supplement_id = await insert_supplement(**MIN_SUPPLEMENT, name="Delete Test")
 
     response = await client.delete(f"/supplements/{supplement_id}", headers=auth_headers)
     assert response.status_code == 204
@@ -381,52 +298,43 @@ async def test_delete_supplement(client, auth_headers):
     assert response.status_code == 404
 
 
-@pytest.mark.asyncio
 async def test_delete_supplement_not_found(client, auth_headers):
     """Test delete supplement that doesn't exist."""
     response = await client.delete("/supplements/99999", headers=auth_headers)
     assert response.status_code == 404
 
 
-@pytest.mark.asyncio
-async def test_invalid_time_of_day(client, auth_headers):
+async def test_invalid_time_of_day(client, json_headers):
     """Test create supplement with invalid time_of_day."""
-    today = date.today().isoformat()
     data = {
         "name": "Invalid Test",
         "dosage_amount": 100,
         "dosage_unit": "mg",
         "purpose": "Test",
         "time_of_day": "invalid_time",
-        "start_date": today,
+        "start_date": OFFSETS[0],
     }
-    response = await client.post("/supplements", json=data, headers=auth_headers)
+    response = await client.post("/supplements", content=orjson.dumps(data), headers=json_headers)
     assert response.status_code == 422  # Validation error
 
 
-@pytest.mark.asyncio
-async def test_dosage_display_formatting(client, auth_headers):
+@pytest.mark.parametrize("amount,unit,expected_display", [
+    (10_000_000_000, "CFU", "10B CFU"),  # 10 billion
+    (5_000_000, "CFU", "5M CFU"),  # 5 million
+    (50_000, "IU", "50K IU"),  # 50 thousand
+    (5000, "IU", "5K IU"),  # 5 thousand
+    (500, "mg", "500 mg"),  # hundreds
+    (1.5, "tbsp", "1.5 tbsp"),  # fractional
+    (0.5, "mg", "0.5 mg"),  # less than 1
+])
+async def test_dosage_display_formatting(client, json_headers, amount, unit, expected_display):
     """Test various dosage display formats."""
-    today = date.today().isoformat()
-    test_cases = [
-        (10_000_000_000, "CFU", "10B CFU"),  # 10 billion
-        (5_000_000, "CFU", "5M CFU"),  # 5 million
-        (50_000, "IU", "50K IU"),  # 50 thousand
-        (5000, "IU", "5K IU"),  # 5 thousand
-        (500, "mg", "500 mg"),  # hundreds
-        (1.5, "tbsp", "1.5 tbsp"),  # fractional
-        (0.5, "mg", "0.5 mg"),  # less than 1
-    ]
-
-    for amount, unit, expected_display in test_cases:
-        response = await client.post("/supplements", json={
-            "name": f"Test {amount} {unit}",
-            "dosage_amount": amount,
-            "dosage_unit": unit,
-            "purpose": "Test",
-            "time_of_day": "morning",
-            "start_date": today,
-        }, headers=auth_headers)
-        assert response.status_code == 201
-        result = response.json()
-        assert result["dosage_display"] == expected_display, f"Expected {expected_display}, got {result['dosage_display']}"
+    response = await client.post("/supplements", content=orjson.dumps(MIN_SUPPLEMENT | {
+        "name": f"Test {amount} {unit}",
+        "dosage_amount": amount,
+        "dosage_unit": unit,
+    }), headers=json_headers)
+
+    assert response.status_code == 201
+    result = json_body(response)
+    assert result["dosage_display"] == expected_display, f"Expected {expected_display}, got {result['dosage_display']}"
@@ -0,0 +1,201 @@
+"""Tests for Withings API endpoints."""
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+import pytest
+
+from app.config import settings
+from app.models.withings import WithingsTokens
+from app.services import withings_service, withings_sync
+from tests.conftest import WEBHOOK_BODY, WEBHOOK_SIGNATURE
+
+
+# Plain async stand-ins for Withings API calls, for tests that only need a canned result
+async def _fake_get_subscriptions():
+    return [1, 4, 16, 44]
+
+
+async def _fake_exchange_code(code):
+    return WithingsTokens(
+        access_token="access123",
+        refresh_token="refresh123",
+        expires_at=datetime.utcnow() + timedelta(hours=3),
+        withings_user_id="12345",
+    )
+
+
+async def _fake_exchange_code_failure(code):
+    raise withings_service.TokenExchangeError(status=503, error="Invalid code", raw={"status": 503})
+
+
+async def _fake_subscribe_all():
+    return [1, 4, 16, 44], []
+
+
+async def _fake_refresh_tokens():
+    return WithingsTokens(
+        access_token="new_access",
+        refresh_token="new_refresh",
+        expires_at=datetime.utcnow() + timedelta(hours=3),
+    )
+
+
+async def _fake_refresh_tokens_failure():
+    return None
+
+
+async def _fake_backfill_all(start_date, end_date):
+    return {
+        "body_measurements": 10,
+        "blood_pressure": 5,
+        "daily_activity": 30,
+        "sleep": 25,
+    }
+
+
+@pytest.mark.usefixtures("withings_settings")
+class TestWithingsEndpoints:
+    """Tests for Withings API endpoints."""
+
+    async def test_get_auth_url(self, client, auth_headers):
+        """Test getting Withings auth URL."""
+        response = await client.get("/withings/auth", headers=auth_headers)
+        assert response.status_code == 200
+
+        data = response.json()
+        assert "auth_url" in data
+        assert "test_client_id" in data["auth_url"]
+        assert "user.metrics" in data["auth_url"]
+
+    async def test_get_auth_url_not_configured(self, client, auth_headers, monkeypatch):
+        """Test getting auth URL when not configured."""
+        monkeypatch.setattr(settings, "withings_client_id", None)
+
+        response = await client.get("/withings/auth", headers=auth_headers)
+        assert response.status_code == 500
+        assert "not configured" in response.json()["detail"]
+
+    async def test_get_status_not_connected(self, client, auth_headers):
+        """Test status when not connected."""
+        response = await client.get("/withings/status", headers=auth_headers)
+        assert response.status_code == 200
+
+        data = response.json()
+        assert data["connected"] is False
+
+    async def test_get_status_connected(self, client, auth_headers, test_db, monkeypatch):
+        """Test status when connected."""
+        # Save tokens first
+        expires_at = datetime.utcnow() + timedelta(hours=3)
+        await withings_service.save_tokens(
+            access_token="test_access",
+            refresh_token="test_refresh",
+            expires_at=expires_at,
+            withings_user_id="12345",
+        )
+
+        # Stub get_subscriptions to avoid API call
+        monkeypatch.setattr(withings_service, "get_subscriptions", _fake_get_subscriptions)
+
+        response = await client.get("/withings/status", headers=auth_headers)
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["connected"] is True
+        assert data["status"] == "active"
+        assert data["withings_user_id"] == "12345"
+
+    async def test_disconnect_no_tokens(self, client, auth_headers):
+        """Test disconnect when not connected."""
+        response = await client.delete("/withings/disconnect", headers=auth_headers)
+        assert response.status_code == 200
+
+        data = response.json()
+        assert data["message"] == "Withings disconnected"
+
+    async def test_webhook_invalid_signature(self, client):
+        """Test webhook with invalid signature."""
+        response = await client.post(
+            "/withings/webhook",
+            data={"appli": "1", "userid": "12345"},
+            headers={"X-Withings-Signature": "invalid"},
+        )
+        assert response.status_code == 401
+
+    async def test_backfill_requires_auth(self, client):
+        """Test backfill endpoint requires authentication."""
+        response = await client.post(
+            "/withings/backfill",
+            json={"start_date": "2024-01-01", "end_date": "2024-01-31"},
+        )
+        assert response.status_code == 401
+
+    async def test_callback_success(self, client, test_db, monkeypatch):
+        """Test OAuth callback success."""
+        # Stub exchange_code to return tokens
+        monkeypatch.setattr(withings_service, "exchange_code", _fake_exchange_code)
+        monkeypatch.setattr(withings_service, "subscribe_all", _fake_subscribe_all)
+
+        response = await client.get("/withings/callback?code=test_code&state=health-tracker")
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["message"] == "Withings connected successfully"
+        assert data["withings_user_id"] == "12345"
+
+    async def test_callback_exchange_failure(self, client, monkeypatch):
+        """Test OAuth callback when exchange fails."""
+        monkeypatch.setattr(withings_service, "exchange_code", _fake_exchange_code_failure)
+
+        response = await client.get("/withings/callback?code=bad_code&state=health-tracker")
+
+        assert response.status_code == 400
+        assert "Withings error 503" in response.json()["detail"]
+
+    async def test_refresh_success(self, client, auth_headers, test_db, monkeypatch):
+        """Test force token refresh success."""
+        monkeypatch.setattr(withings_service, "refresh_tokens", _fake_refresh_tokens)
+
+        response = await client.post("/withings/refresh", headers=auth_headers)
+
+        assert response.status_code == 200
+        assert response.json()["message"] == "Token refreshed successfully"
+
+    async def test_refresh_failure(self, client, auth_headers, test_db, monkeypatch):
+        """Test force token refresh failure."""
+        monkeypatch.setattr(withings_service, "refresh_tokens", _fake_refresh_tokens_failure)
+
+        response = await client.post("/withings/refresh", headers=auth_headers)
+
+        assert response.status_code == 400
+        assert "Failed to refresh" in response.json()["detail"]
+
+    async def test_webhook_valid_signature(self, client, test_db):
+        """Test webhook with valid signature."""
+        with patch.object(withings_service, 'verify_signature', return_value=True):
+            response = await client.post(
+                "/withings/webhook",
+                content=WEBHOOK_BODY,
+                headers={
+                    "Content-Type": "application/x-www-form-urlencoded",
+                    "X-Withings-Signature": WEBHOOK_SIGNATURE,
+                },
+            )
+
+        assert response.status_code == 200
+        assert response.json()["status"] == "ok"
+
+    async def test_backfill_success(self, client, auth_headers, test_db, monkeypatch):
+        """Test backfill endpoint success."""
+        monkeypatch.setattr(withings_sync, "backfill_all", _fake_backfill_all)
+
+        response = await client.post(
+            "/withings/backfill",
+            json={"start_date": "2024-01-01", "end_date": "2024-01-31"},
+            headers=auth_headers,
+        )
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["message"] == "Backfill completed"
+        assert data["counts"]["body_measurements"] == 10
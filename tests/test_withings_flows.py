@@ -6,19 +6,198 @@ Tests the complete flows:
 2. Token refresh
 3. Data sync (webhook-triggered and manual backfill)
 """
+import asyncio
+
 import pytest
-from unittest.mock import patch, AsyncMock, MagicMock
 from datetime import datetime, timedelta
 
+from app.config import settings
+from app.models.withings import WithingsTokens
 from app.services import withings_service, withings_sync
 from app.database import get_db
+from tests.conftest import fetch_row, sign
+
+# Token expiry times; every test uses windows of an hour or more, so "now" is
+# taken once at import
+SESSION_NOW = datetime.utcnow()
+PAST_1H = SESSION_NOW - timedelta(hours=1)
+FUTURE_3H = SESSION_NOW + timedelta(hours=3)
+
+
+@pytest.fixture(autouse=True)
+def no_network(respx_mock):
+    """Run every flow test under respx so an unmocked Withings call fails instead of going out."""
+    return respx_mock
+
+
+# save_tokens arguments for stored_token; override per test via indirect parametrization
+STORED_TOKEN = {
+    "access_token": "valid_token",
+    "refresh_token": "refresh",
+    "expires_at": FUTURE_3H,
+    "withings_user_id": "12345",
+}
+
+
+@pytest.fixture
+async def stored_token(request, test_db):
+    """Store a Withings token row, valid for three hours unless parametrized otherwise."""
+    token = STORED_TOKEN | getattr(request, "param", {})
+    await withings_service.save_tokens(**token)
+    return token
+
+
+# Canned Withings API payloads
+TOKEN_EXCHANGE_OK = {
+    "status": 0,
+    "body": {
+        "access_token": "access_token_12345",
+        "refresh_token": "refresh_token_67890",
+        "expires_in": 10800,  # 3 hours
+        "userid": 98765,
+    },
+}
+TOKEN_REFRESH_OK = {
+    "status": 0,
+    "body": {
+        "access_token": "new_fresh_token",
+        "refresh_token": "new_refresh_token",
+        "expires_in": 10800,
+        "userid": "12345",
+    },
+}
+TOKEN_REFRESH_FAIL_401 = {
+    "status": 401,  # Unauthorized
+    "error": "invalid_grant",
+}
+WITHINGS_OK = {"status": 0}
+
+# Webhook payload for a weight measurement (appli=1), signed under the "webhook_secret"
+# client secret the webhook flow tests configure
+WEBHOOK_SECRET = "webhook_secret"
+WEBHOOK_BODY = b"userid=12345&appli=1&startdate=1705276800&enddate=1705363200"
+WEBHOOK_SIGNATURE = sign(WEBHOOK_BODY, secret=WEBHOOK_SECRET)
+
+# (sync function, Withings payload, fetch_row lookup for the stored row, expected column values)
+SYNC_CASES = [
+    pytest.param(
+        withings_sync.sync_body_measurements,
+        [
+            {
+                "grpid": 1001,
+                "date": 1705305600,  # 2024-01-15 08:00 UTC
+                "measures": [
+                    {"type": 1, "value": 75000, "unit": -3},   # Weight
+                    {"type": 8, "value": 15000, "unit": -3},   # Fat mass
+                    {"type": 76, "value": 30000, "unit": -3},  # Muscle mass
+                ],
+            }
+        ],
+        ("body_measurements", "withings_id", "1001"),
+        {"weight_lbs": 165.35, "fat_mass_lbs": 33.07, "muscle_mass_lbs": 66.14},
+        id="body",
+    ),
+    pytest.param(
+        withings_sync.sync_blood_pressure,
+        [
+            {
+                "grpid": 2001,
+                "date": 1705309200,  # 2024-01-15 09:00 UTC
+                "measures": [
+                    {"type": 10, "value": 118, "unit": 0},
+                    {"type": 9, "value": 78, "unit": 0},
+                    {"type": 11, "value": 68, "unit": 0},
+                ],
+            }
+        ],
+        ("blood_pressure", "withings_id", "2001"),
+        {"systolic": 118, "diastolic": 78, "heart_rate": 68},
+        id="blood_pressure",
+    ),
+    pytest.param(
+        withings_sync.sync_activity,
+        [
+            {"date": "2024-01-15", "steps": 10500, "distance": 8400, "calories": 420},
+        ],
+        ("daily_activity", "date", "2024-01-15"),
+        {"steps": 10500, "distance_miles": 5.22},
+        id="activity",
+    ),
+    pytest.param(
+        withings_sync.sync_sleep,
+        [
+            {
+                "id": 3001,
+                "date": "2024-01-15",
+                "startdate": 1705273200,  # 2024-01-14 23:00 UTC
+                "enddate": 1705302000,  # 2024-01-15 07:00 UTC
+                "data": {
+                    "deepsleepduration": 5400,
+                    "lightsleepduration": 14400,
+                    "remsleepduration": 5400,
+                    "wakeupduration": 1800,
+                },
+            }
+        ],
+        ("sleep", "withings_id", "3001"),
+        {"deep_minutes": 90, "light_minutes": 240, "rem_minutes": 90, "awake_minutes": 30},
+        id="sleep",
+    ),
+]
 
 
 class TestOAuthTokenAcquisitionFlow:
     """Test the complete OAuth token acquisition flow."""
 
-    @pytest.mark.asyncio
-    async def test_full_oauth_flow(self, client, test_db, monkeypatch):
+    async def test_auth_url_contains_client_id(self, authenticated_client, monkeypatch):
+        """Step 1 alone: the auth URL carries the client id, scopes and callback host."""
+        monkeypatch.setattr(settings, "withings_client_id", "test_client_id")
+        monkeypatch.setattr(settings, "base_url", "https://myapp.example.com")
+
+        response = await authenticated_client.get("/withings/auth")
+
+        assert response.status_code == 200
+        auth_url = response.json()["auth_url"]
+        assert "test_client_id" in auth_url
+        assert "user.metrics" in auth_url
+        assert "myapp.example.com" in auth_url
+
+    async def test_callback_stores_tokens(self, client, test_db, monkeypatch, respx_mock):
+        """Steps 3-5 alone: the callback exchanges the code, stores tokens and subscribes webhooks."""
+        monkeypatch.setattr(settings, "withings_client_id", "test_client_id")
+        monkeypatch.setattr(settings, "withings_client_secret", "test_secret")
+        monkeypatch.setattr(settings, "base_url", "https://myapp.example.com")
+        respx_mock.post(withings_service.WITHINGS_TOKEN_URL).respond(json=TOKEN_EXCHANGE_OK)
+        notify = respx_mock.post(withings_service.WITHINGS_NOTIFY_URL).respond(json=WITHINGS_OK)
+        respx_mock.route(host="wbsapi.withings.net").respond(json=WITHINGS_OK)
+
+        response = await client.get("/withings/callback?code=auth_code_xyz&state=health-tracker")
+
+        assert response.status_code == 200
+        assert response.json()["subscriptions"] == [1, 4, 16, 44]
+        assert notify.call_count == 4
+        tokens = await withings_service.get_tokens()
+        assert (tokens.access_token, tokens.refresh_token, tokens.withings_user_id, tokens.status) == (
+            "access_token_12345", "refresh_token_67890", "98765", "active",
+        )
+
+    async def test_status_reports_connected(self, authenticated_client, stored_token, monkeypatch):
+        """Step 6 alone: with tokens already stored, status shows connected."""
+        async def fake_get_subscriptions():
+            return [1, 4, 16, 44]
+
+        monkeypatch.setattr(withings_service, "get_subscriptions", fake_get_subscriptions)
+
+        response = await authenticated_client.get("/withings/status")
+
+        assert response.status_code == 200
+        status = response.json()
+        assert status["connected"] is True
+        assert status["status"] == "active"
+        assert status["withings_user_id"] == stored_token["withings_user_id"]
+
+    @pytest.mark.slow
+    async def test_full_oauth_flow(self, authenticated_client, monkeypatch, respx_mock):
         """
         Test complete OAuth flow:
         1. Get auth URL
@@ -28,17 +207,13 @@ class TestOAuthTokenAcquisitionFlow:
         5. Webhooks are subscribed
         6. Status shows connected
         """
-        from app.config import settings
-
         # Configure Withings settings
         monkeypatch.setattr(settings, "withings_client_id", "test_client_id")
         monkeypatch.setattr(settings, "withings_client_secret", "test_secret")
         monkeypatch.setattr(settings, "base_url", "https://myapp.example.com")
 
-        auth_headers = {"Authorization": "Bearer test-token"}
-
         # Step 1: Get auth URL
-        response = await client.get("/withings/auth", headers=auth_headers)
+        response = await authenticated_client.get("/withings/auth")
         assert response.status_code == 200
         auth_url = response.json()["auth_url"]
         assert "test_client_id" in auth_url
@@ -47,35 +222,12 @@ class TestOAuthTokenAcquisitionFlow:
 
         # Step 2 & 3: Simulate callback with authorization code
         # Mock the Withings API response for token exchange
-        mock_token_response = MagicMock()
-        mock_token_response.json.return_value = {
-            "status": 0,
-            "body": {
-                "access_token": "access_token_12345",
-                "refresh_token": "refresh_token_67890",
-                "expires_in": 10800,  # 3 hours
-                "userid": 98765,
-            },
-        }
-
-        # Mock webhook subscription responses
-        mock_subscribe_response = MagicMock()
-        mock_subscribe_response.json.return_value = {"status": 0}
-
-        with patch("httpx.AsyncClient.post", new_callable=AsyncMock) as mock_post:
-            mock_post.return_value = mock_token_response
-
-            # After token exchange, subsequent calls are for webhook subscription
-            def side_effect(*args, **kwargs):
-                # First call is token exchange, rest are subscriptions
-                if "oauth2" in str(kwargs.get("data", {})) or "authorization_code" in str(kwargs.get("data", {})):
-                    return mock_token_response
-                return mock_subscribe_response
-
-            mock_post.side_effect = side_effect
-            mock_post.return_value = mock_token_response
+        respx_mock.post(withings_service.WITHINGS_TOKEN_URL).respond(json=TOKEN_EXCHANGE_OK)
+        # Every other Withings call (webhook subscriptions, the background
+        # backfill) gets an empty success response
+        respx_mock.route(host="wbsapi.withings.net").respond(json=WITHINGS_OK)
 
-            response = await client.get("/withings/callback?code=auth_code_xyz&state=health-tracker")
+        response = await authenticated_client.get("/withings/callback?code=auth_code_xyz&state=health-tracker")
 
         assert response.status_code == 200
         data = response.json()
@@ -91,9 +243,11 @@ class TestOAuthTokenAcquisitionFlow:
         assert tokens.status == "active"
 
         # Step 5: Verify status endpoint shows connected
-        with patch.object(withings_service, 'get_subscriptions', new_callable=AsyncMock) as mock_subs:
-            mock_subs.return_value = [1, 4, 16, 44]
-            response = await client.get("/withings/status", headers=auth_headers)
+        async def fake_get_subscriptions():
+            return [1, 4, 16, 44]
+
+        monkeypatch.setattr(withings_service, "get_subscriptions", fake_get_subscriptions)
+        response = await authenticated_client.get("/withings/status")
 
         assert response.status_code == 200
         status = response.json()
@@ -105,8 +259,8 @@ class TestOAuthTokenAcquisitionFlow:
 class TestTokenRefreshFlow:
     """Test the token refresh flow."""
 
-    @pytest.mark.asyncio
-    async def test_automatic_token_refresh_on_expired(self, test_db, monkeypatch):
+    @pytest.mark.parametrize("stored_token", [{"expires_at": PAST_1H}], indirect=True)
+    async def test_automatic_token_refresh_on_expired(self, stored_token, monkeypatch, respx_mock):
         """
         Test that expired tokens are automatically refreshed:
         1. Store expired token
@@ -114,38 +268,16 @@ class TestTokenRefreshFlow:
         3. Verify refresh API is called
         4. Verify new tokens are stored
         """
-        from app.config import settings
-
         monkeypatch.setattr(settings, "withings_client_id", "test_client_id")
         monkeypatch.setattr(settings, "withings_client_secret", "test_secret")
 
-        # Step 1: Store an expired token
-        expired_time = datetime.utcnow() - timedelta(hours=1)
-        await withings_service.save_tokens(
-            access_token="old_expired_token",
-            refresh_token="valid_refresh_token",
-            expires_at=expired_time,
-            withings_user_id="12345",
-        )
-
-        # Verify token is expired
+        # Step 1: stored_token holds an expired token
         assert await withings_service.is_token_valid() is False
 
         # Step 2 & 3: Mock refresh API and call get_valid_token
-        mock_response = MagicMock()
-        mock_response.json.return_value = {
-            "status": 0,
-            "body": {
-                "access_token": "new_fresh_token",
-                "refresh_token": "new_refresh_token",
-                "expires_in": 10800,
-                "userid": "12345",
-            },
-        }
+        respx_mock.post(withings_service.WITHINGS_TOKEN_URL).respond(json=TOKEN_REFRESH_OK)
 
-        with patch("httpx.AsyncClient.post", new_callable=AsyncMock) as mock_post:
-            mock_post.return_value = mock_response
-            token = await withings_service.get_valid_token()
+        token = await withings_service.get_valid_token()
 
         # Verify we got the new token
         assert token == "new_fresh_token"
@@ -156,37 +288,20 @@ class TestTokenRefreshFlow:
         assert tokens.refresh_token == "new_refresh_token"
         assert tokens.status == "active"
 
-    @pytest.mark.asyncio
-    async def test_token_refresh_failure_marks_needs_reauth(self, test_db, monkeypatch):
+    async def test_token_refresh_failure_marks_needs_reauth(self, stored_token, monkeypatch, respx_mock):
         """
         Test that failed refresh marks status as needs_reauth:
         1. Store valid token
         2. Attempt refresh with API failure
         3. Verify status is 'needs_reauth'
         """
-        from app.config import settings
-
         monkeypatch.setattr(settings, "withings_client_id", "test_client_id")
         monkeypatch.setattr(settings, "withings_client_secret", "test_secret")
 
-        # Store a token
-        await withings_service.save_tokens(
-            access_token="some_token",
-            refresh_token="some_refresh",
-            expires_at=datetime.utcnow() + timedelta(hours=1),
-            withings_user_id="12345",
-        )
-
         # Mock failed refresh (e.g., refresh token revoked)
-        mock_response = MagicMock()
-        mock_response.json.return_value = {
-            "status": 401,  # Unauthorized
-            "error": "invalid_grant",
-        }
+        respx_mock.post(withings_service.WITHINGS_TOKEN_URL).respond(json=TOKEN_REFRESH_FAIL_401)
 
-        with patch("httpx.AsyncClient.post", new_callable=AsyncMock) as mock_post:
-            mock_post.return_value = mock_response
-            result = await withings_service.refresh_tokens()
+        result = await withings_service.refresh_tokens()
 
         # Verify refresh failed
         assert result is None
@@ -195,34 +310,28 @@ class TestTokenRefreshFlow:
         tokens = await withings_service.get_tokens()
         assert tokens.status == "needs_reauth"
 
-    @pytest.mark.asyncio
-    async def test_manual_token_refresh_endpoint(self, client, test_db, auth_headers, monkeypatch):
+    async def test_manual_token_refresh_endpoint(self, authenticated_client, stored_token, monkeypatch):
         """
         Test manual token refresh via API endpoint:
         1. Store token
         2. Call POST /withings/refresh
         3. Verify new tokens
         """
-        from app.config import settings
-
         monkeypatch.setattr(settings, "withings_client_id", "test_client_id")
         monkeypatch.setattr(settings, "withings_client_secret", "test_secret")
 
-        # Store a token
-        await withings_service.save_tokens(
-            access_token="old_token",
-            refresh_token="refresh_token",
-            expires_at=datetime.utcnow() + timedelta(hours=1),
+        # Mock refresh_tokens function directly
+        refreshed = WithingsTokens(
+            access_token="manually_refreshed_token",
+            refresh_token="refresh",
+            expires_at=FUTURE_3H,
         )
 
-        # Mock refresh_tokens function directly
-        mock_tokens = MagicMock()
-        mock_tokens.expires_at = datetime.utcnow() + timedelta(hours=3)
-        mock_tokens.access_token = "manually_refreshed_token"
+        async def fake_refresh_tokens():
+            return refreshed
 
-        with patch.object(withings_service, 'refresh_tokens', new_callable=AsyncMock) as mock_refresh:
-            mock_refresh.return_value = mock_tokens
-            response = await client.post("/withings/refresh", headers=auth_headers)
+        monkeypatch.setattr(withings_service, "refresh_tokens", fake_refresh_tokens)
+        response = await authenticated_client.post("/withings/refresh")
 
         assert response.status_code == 200
         assert "Token refreshed successfully" in response.json()["message"]
@@ -231,8 +340,7 @@ class TestTokenRefreshFlow:
 class TestSyncFlow:
     """Test the data synchronization flows."""
 
-    @pytest.mark.asyncio
-    async def test_webhook_triggered_sync_flow(self, client, test_db, monkeypatch):
+    async def test_webhook_triggered_sync_flow(self, client, stored_token, monkeypatch):
         """
         Test webhook-triggered sync:
         1. Receive webhook notification
@@ -241,35 +349,23 @@ class TestSyncFlow:
         4. Store data in local database
         5. Verify data is queryable
         """
-        from app.config import settings
+        monkeypatch.setattr(settings, "withings_client_secret", WEBHOOK_SECRET)
 
-        monkeypatch.setattr(settings, "withings_client_secret", "webhook_secret")
+        # Stub sync_by_appli at the service level to avoid httpx conflicts
+        async def fake_sync_by_appli(appli, startdate=None, enddate=None):
+            return 0
 
-        # Store valid token for API calls
-        await withings_service.save_tokens(
-            access_token="valid_token",
-            refresh_token="refresh",
-            expires_at=datetime.utcnow() + timedelta(hours=3),
-        )
+        monkeypatch.setattr(withings_sync, "sync_by_appli", fake_sync_by_appli)
 
-        # Simulate webhook payload for weight measurement (appli=1)
-        import hmac
-        import hashlib
-
-        webhook_body = b"userid=12345&appli=1&startdate=1705276800&enddate=1705363200"
-        signature = hmac.new(b"webhook_secret", webhook_body, hashlib.sha256).hexdigest()
-
-        # Mock sync_by_appli at the service level to avoid httpx conflicts
-        with patch.object(withings_sync, 'sync_by_appli', new_callable=AsyncMock) as mock_sync:
-            # Send webhook
-            response = await client.post(
-                "/withings/webhook",
-                content=webhook_body,
-                headers={
-                    "Content-Type": "application/x-www-form-urlencoded",
-                    "X-Withings-Signature": signature,
-                },
-            )
+        # Send webhook
+        response = await client.post(
+            "/withings/webhook",
+            content=WEBHOOK_BODY,
+            headers={
+                "Content-Type": "application/x-www-form-urlencoded",
+                "X-Withings-Signature": WEBHOOK_SIGNATURE,
+            },
+        )
 
         assert response.status_code == 200
 
@@ -288,18 +384,28 @@ class TestSyncFlow:
         await withings_sync.sync_body_measurements(measure_groups)
 
         # Verify data is in database
-        async with get_db() as db:
-            cursor = await db.execute(
-                "SELECT * FROM body_measurements WHERE withings_id = '999888'"
-            )
-            row = await cursor.fetchone()
+        row = await fetch_row("body_measurements", "withings_id", "999888")
 
         assert row is not None
-        assert abs(row["weight_lbs"] - 165.35) < 0.1  # 75kg in lbs
+        assert row["weight_lbs"] == pytest.approx(165.35, abs=0.1)  # 75kg in lbs
         assert row["source"] == "withings"
 
-    @pytest.mark.asyncio
-    async def test_manual_backfill_sync_flow(self, client, test_db, auth_headers, monkeypatch):
+    def test_webhook_signature_matches_body(self, monkeypatch):
+        """WEBHOOK_SIGNATURE verifies against WEBHOOK_BODY under the configured secret."""
+        monkeypatch.setattr(settings, "withings_client_secret", WEBHOOK_SECRET)
+
+        assert withings_service.verify_signature(WEBHOOK_BODY, WEBHOOK_SIGNATURE) is True
+
+    @pytest.mark.parametrize("appli", [1, 4, 16, 44])
+    def test_webhook_signature_per_appli(self, monkeypatch, appli):
+        """Bodies for every subscribed data type verify under their own signature."""
+        monkeypatch.setattr(settings, "withings_client_secret", WEBHOOK_SECRET)
+        body = f"userid=12345&appli={appli}&startdate=1705276800&enddate=1705363200".encode()
+
+        assert withings_service.verify_signature(body, sign(body, secret=WEBHOOK_SECRET)) is True
+        assert withings_service.verify_signature(body, WEBHOOK_SIGNATURE) is (appli == 1)
+
+    async def test_manual_backfill_sync_flow(self, authenticated_client, stored_token, monkeypatch):
         """
         Test manual backfill sync:
         1. Store valid token
@@ -307,30 +413,22 @@ class TestSyncFlow:
         3. Verify all data types are fetched
         4. Verify data is stored and queryable
         """
-        # Store valid token
-        await withings_service.save_tokens(
-            access_token="backfill_token",
-            refresh_token="refresh",
-            expires_at=datetime.utcnow() + timedelta(hours=3),
-        )
-
-        # Mock backfill_all at the service level to return expected counts
+        # Stub backfill_all at the service level to return expected counts
         # and manually insert the data to simulate what backfill does
-        mock_counts = {
-            "body_measurements": 1,
-            "blood_pressure": 1,
-            "daily_activity": 2,
-            "sleep": 1,
-        }
-
-        with patch.object(withings_sync, 'backfill_all', new_callable=AsyncMock) as mock_backfill:
-            mock_backfill.return_value = mock_counts
-
-            response = await client.post(
-                "/withings/backfill",
-                json={"start_date": "2024-01-01", "end_date": "2024-01-31"},
-                headers=auth_headers,
-            )
+        async def fake_backfill_all(start_date, end_date):
+            return {
+                "body_measurements": 1,
+                "blood_pressure": 1,
+                "daily_activity": 2,
+                "sleep": 1,
+            }
+
+        monkeypatch.setattr(withings_sync, "backfill_all", fake_backfill_all)
+
+        response = await authenticated_client.post(
+            "/withings/backfill",
+            json={"start_date": "2024-01-01", "end_date": "2024-01-31"},
+        )
 
         assert response.status_code == 200
         data = response.json()
@@ -379,35 +477,33 @@ class TestSyncFlow:
             }
         ]
 
-        # Sync the data
-        await withings_sync.sync_body_measurements(body_data)
-        await withings_sync.sync_blood_pressure(bp_data)
-        await withings_sync.sync_activity(activity_data)
-        await withings_sync.sync_sleep(sleep_data)
+        # Sync the data; each type writes its own table, so run them concurrently
+        await asyncio.gather(
+            withings_sync.sync_body_measurements(body_data),
+            withings_sync.sync_blood_pressure(bp_data),
+            withings_sync.sync_activity(activity_data),
+            withings_sync.sync_sleep(sleep_data),
+        )
 
         # Verify data is queryable
         async with get_db() as db:
-            # Check body measurements
-            cursor = await db.execute("SELECT COUNT(*) as cnt FROM body_measurements WHERE source = 'withings'")
-            row = await cursor.fetchone()
-            assert row["cnt"] >= 1
-
-            # Check blood pressure
-            cursor = await db.execute("SELECT COUNT(*) as cnt FROM blood_pressure WHERE source = 'withings'")
-            row = await cursor.fetchone()
-            assert row["cnt"] >= 1
-
-            # Check activity
-            cursor = await db.execute("SELECT COUNT(*) as cnt FROM daily_activity WHERE source = 'withings'")
+            # Count Withings rows in every table with one query
+            cursor = await db.execute(
+                """
+                SELECT
+                    (SELECT COUNT(*) FROM body_measurements WHERE source = 'withings') AS body,
+                    (SELECT COUNT(*) FROM blood_pressure WHERE source = 'withings') AS bp,
+                    (SELECT COUNT(*) FROM daily_activity WHERE source = 'withings') AS activity,
+                    (SELECT COUNT(*) FROM sleep WHERE source = 'withings') AS sleep
+                """
+            )
             row = await cursor.fetchone()
-            assert row["cnt"] >= 2
 
-            # Check sleep
-            cursor = await db.execute("SELECT COUNT(*) as cnt FROM sleep WHERE source = 'withings'")
-            row = await cursor.fetchone()
-            assert row["cnt"] >= 1
+        assert row["body"] >= 1
+        assert row["bp"] >= 1
+        assert row["activity"] >= 2
+        assert row["sleep"] >= 1
 
-    @pytest.mark.asyncio
     async def test_sync_deduplication_flow(self, test_db):
         """
         Test that sync properly deduplicates data:
@@ -418,7 +514,7 @@ class TestSyncFlow:
         measure_groups = [
             {
                 "grpid": 12345,
-                "date": int(datetime(2024, 1, 15, 8, 0).timestamp()),
+                "date": 1705305600,  # 2024-01-15 08:00 UTC
                 "measures": [{"type": 1, "value": 80000, "unit": -3}],
             }
         ]
@@ -439,96 +535,15 @@ class TestSyncFlow:
             row = await cursor.fetchone()
             assert row["cnt"] == 1
 
-    @pytest.mark.asyncio
-    async def test_sync_all_data_types_flow(self, test_db):
+    @pytest.mark.parametrize("sync,data,lookup,expected", SYNC_CASES)
+    async def test_sync_data_type_flow(self, test_db, sync, data, lookup, expected):
         """
-        Test syncing all four data types in sequence.
+        Test syncing each of the four data types and reading it back.
         """
-        # Body measurements (weight)
-        body_data = [
-            {
-                "grpid": 1001,
-                "date": int(datetime(2024, 1, 15, 8, 0).timestamp()),
-                "measures": [
-                    {"type": 1, "value": 75000, "unit": -3},   # Weight
-                    {"type": 8, "value": 15000, "unit": -3},   # Fat mass
-                    {"type": 76, "value": 30000, "unit": -3},  # Muscle mass
-                ],
-            }
-        ]
-        body_count = await withings_sync.sync_body_measurements(body_data)
-        assert body_count == 1
+        count = await sync(data)
+        assert count == 1
 
-        # Blood pressure
-        bp_data = [
-            {
-                "grpid": 2001,
-                "date": int(datetime(2024, 1, 15, 9, 0).timestamp()),
-                "measures": [
-                    {"type": 10, "value": 118, "unit": 0},
-                    {"type": 9, "value": 78, "unit": 0},
-                    {"type": 11, "value": 68, "unit": 0},
-                ],
-            }
-        ]
-        bp_count = await withings_sync.sync_blood_pressure(bp_data)
-        assert bp_count == 1
-
-        # Activity
-        activity_data = [
-            {"date": "2024-01-15", "steps": 10500, "distance": 8400, "calories": 420},
-        ]
-        activity_count = await withings_sync.sync_activity(activity_data)
-        assert activity_count == 1
+        row = await fetch_row(*lookup)
 
-        # Sleep
-        sleep_data = [
-            {
-                "id": 3001,
-                "date": "2024-01-15",
-                "startdate": int(datetime(2024, 1, 14, 23, 0).timestamp()),
-                "enddate": int(datetime(2024, 1, 15, 7, 0).timestamp()),
-                "data": {
-                    "deepsleepduration": 5400,
-                    "lightsleepduration": 14400,
-                    "remsleepduration": 5400,
-                    "wakeupduration": 1800,
-                },
-            }
-        ]
-        sleep_count = await withings_sync.sync_sleep(sleep_data)
-        assert sleep_count == 1
-
-        # Verify all data is in database
-        async with get_db() as db:
-            # Body
-            cursor = await db.execute("SELECT * FROM body_measurements WHERE withings_id = '1001'")
-            row = await cursor.fetchone()
-            assert row is not None
-            assert abs(row["weight_lbs"] - 165.35) < 0.1
-            assert abs(row["fat_mass_lbs"] - 33.07) < 0.1
-            assert abs(row["muscle_mass_lbs"] - 66.14) < 0.1
-
-            # BP
-            cursor = await db.execute("SELECT * FROM blood_pressure WHERE withings_id = '2001'")
-            row = await cursor.fetchone()
-            assert row is not None
-            assert row["systolic"] == 118
-            assert row["diastolic"] == 78
-            assert row["heart_rate"] == 68
-
-            # Activity
-            cursor = await db.execute("SELECT * FROM daily_activity WHERE date = '2024-01-15'")
-            row = await cursor.fetchone()
-            assert row is not None
-            assert row["steps"] == 10500
-            assert abs(row["distance_miles"] - 5.22) < 0.1
-
-            # Sleep
-            cursor = await db.execute("SELECT * FROM sleep WHERE withings_id = '3001'")
-            row = await cursor.fetchone()
-            assert row is not None
-            assert row["deep_minutes"] == 90
-            assert row["light_minutes"] == 240
-            assert row["rem_minutes"] == 90
-            assert row["awake_minutes"] == 30
+        assert row is not None
+        assert {column: row[column] for column in expected} == pytest.approx(expected, abs=0.1)
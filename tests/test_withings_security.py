@@ -8,57 +8,85 @@ Tests for:
 4. Error handling edge cases
 5. Data integrity
 """
+import asyncio
 import pytest
-from unittest.mock import patch, AsyncMock, MagicMock
-from datetime import datetime, timedelta
-import hmac
-import hashlib
+from datetime import datetime, timedelta, timezone
 import base64
 
+from app.config import settings
 from app.services import withings_service, withings_sync
 from app.database import get_db
+from tests.conftest import sign
 
+# Webhook bodies for weight (appli=1) and blood pressure (appli=4), signed once at import
+_BODY1 = b"userid=12345&appli=1&startdate=1705276800&enddate=1705363200"
+_SIG1 = sign(_BODY1, secret="secret")
+_BODY2 = b"userid=12345&appli=4&startdate=1705276800&enddate=1705363200"
+_SIG2 = sign(_BODY2, secret="secret")
 
+# Measurement time shared by the sync edge-case payloads: 2024-01-15 08:00 UTC
+_TS_JAN15_08 = int(datetime(2024, 1, 15, 8, 0, tzinfo=timezone.utc).timestamp())
+
+
+@pytest.fixture
+def mocked_get_subscriptions(monkeypatch):
+    """Report a weight subscription without calling the Withings API."""
+    async def get_subscriptions():
+        return [1]
+
+    monkeypatch.setattr(withings_service, "get_subscriptions", get_subscriptions)
+
+
+@pytest.fixture
+def mocked_disconnect(monkeypatch):
+    """Stub out disconnect, reporting four webhooks unsubscribed."""
+    async def disconnect():
+        return 4
+
+    monkeypatch.setattr(withings_service, "disconnect", disconnect)
+
+
+@pytest.fixture
+def mocked_sync_by_appli(monkeypatch):
+    """Stub out webhook-triggered syncs; returns the list of appli values dispatched."""
+    calls = []
+
+    async def sync_by_appli(appli, startdate=None, enddate=None):
+        calls.append(appli)
+        return 0
+
+    monkeypatch.setattr(withings_sync, "sync_by_appli", sync_by_appli)
+    return calls
+
+
+@pytest.mark.usefixtures("withings_settings")
 class TestOAuthSecurity:
     """Security tests for OAuth flow."""
 
     @pytest.mark.asyncio
-    async def test_callback_validates_state_parameter(self, client, test_db, monkeypatch):
+    async def test_callback_validates_state_parameter(self, client):
         """OAuth callback should validate state parameter to prevent CSRF."""
-        from app.config import settings
-        monkeypatch.setattr(settings, "withings_client_id", "test_id")
-        monkeypatch.setattr(settings, "withings_client_secret", "test_secret")
-        monkeypatch.setattr(settings, "base_url", "https://example.com")
-
         # Send callback with wrong state
         response = await client.get("/withings/callback?code=test&state=wrong-state")
         assert response.status_code == 400
         assert "Invalid state" in response.json()["detail"]
 
     @pytest.mark.asyncio
-    async def test_callback_rejects_missing_state(self, client, test_db, monkeypatch):
+    async def test_callback_rejects_missing_state(self, client):
         """OAuth callback should reject missing state parameter."""
-        from app.config import settings
-        monkeypatch.setattr(settings, "withings_client_id", "test_id")
-        monkeypatch.setattr(settings, "withings_client_secret", "test_secret")
-
         # Send callback without state
         response = await client.get("/withings/callback?code=test")
         assert response.status_code == 400
         assert "Invalid state" in response.json()["detail"]
 
     @pytest.mark.asyncio
-    async def test_callback_requires_code(self, client, test_db, monkeypatch):
+    async def test_callback_requires_code(self, client):
         """OAuth callback should require authorization code."""
-        from app.config import settings
-        monkeypatch.setattr(settings, "withings_client_id", "test_id")
-        monkeypatch.setattr(settings, "withings_client_secret", "test_secret")
-
         response = await client.get("/withings/callback?state=health-tracker")
         assert response.status_code == 422  # Validation error
 
     @pytest.mark.asyncio
-    async def test_tokens_not_exposed_in_status_response(self, client, test_db, auth_headers):
+    async def test_tokens_not_exposed_in_status_response(self, client, auth_headers, mocked_get_subscriptions):
         """Status endpoint should not expose raw tokens."""
         await withings_service.save_tokens(
             access_token="secret_access_token_12345",
@@ -67,54 +95,36 @@ class TestOAuthSecurity:
             withings_user_id="12345",
         )
 
-        with patch.object(withings_service, 'get_subscriptions', new_callable=AsyncMock) as mock:
-            mock.return_value = [1]
-            response = await client.get("/withings/status", headers=auth_headers)
+        response = await client.get("/withings/status", headers=auth_headers)
 
-        data = response.json()
-        # Should not contain actual token values
-        assert "secret_access_token" not in str(data)
-        assert "secret_refresh_token" not in str(data)
+        # Search the raw body so a token nested at any depth, key or value, is caught
+        assert "secret_access_token" not in response.text
+        assert "secret_refresh_token" not in response.text
         # Should indicate connected status without exposing secrets
-        assert data["connected"] is True
+        assert response.json()["connected"] is True
 
     @pytest.mark.asyncio
-    async def test_disconnect_clears_all_tokens(self, client, test_db, auth_headers):
-        """Disconnect should completely remove all token data."""
-        await withings_service.save_tokens(
-            access_token="token",
-            refresh_token="refresh",
-            expires_at=datetime.utcnow() + timedelta(hours=3),
-            withings_user_id="12345",
-        )
-
-        # Mock the disconnect function to actually clear tokens
-        with patch.object(withings_service, 'disconnect', new_callable=AsyncMock) as mock_disconnect:
-            mock_disconnect.return_value = 4  # Number of webhooks unsubscribed
-
-            response = await client.delete("/withings/disconnect", headers=auth_headers)
-
+    async def test_disconnect_endpoint_returns_200(self, client, auth_headers, mocked_disconnect):
+        """Disconnect endpoint should succeed once the service has disconnected."""
+        response = await client.delete("/withings/disconnect", headers=auth_headers)
         assert response.status_code == 200
 
-        # The actual disconnect was mocked, so manually verify the behavior
-        # by calling the real disconnect and checking
-        await withings_service.disconnect()
-        tokens = await withings_service.get_tokens()
-        assert tokens is None
+    @pytest.mark.asyncio
+    async def test_disconnect_service_clears_tokens(self, valid_tokens, respx_mock):
+        """Disconnect should completely remove all token data."""
+        respx_mock.post(withings_service.WITHINGS_NOTIFY_URL).respond(json={"status": 0})
+        respx_mock.post(withings_service.WITHINGS_TOKEN_URL).respond(json={"status": 0})
+
+        assert await withings_service.disconnect() == 4
+        assert await withings_service.get_tokens() is None
 
 
 class TestInputValidation:
     """Tests for input validation and sanitization."""
 
     @pytest.mark.asyncio
-    async def test_backfill_validates_date_range(self, client, test_db, auth_headers):
+    async def test_backfill_validates_date_range(self, client, valid_tokens, auth_headers):
         """Backfill should validate date range."""
-        await withings_service.save_tokens(
-            access_token="token",
-            refresh_token="refresh",
-            expires_at=datetime.utcnow() + timedelta(hours=3),
-        )
-
         # End date before start date
         response = await client.post(
             "/withings/backfill",
@@ -125,14 +135,8 @@ class TestInputValidation:
         assert response.status_code in [200, 400]
 
     @pytest.mark.asyncio
-    async def test_backfill_rejects_invalid_date_format(self, client, test_db, auth_headers):
+    async def test_backfill_rejects_invalid_date_format(self, client, valid_tokens, auth_headers):
         """Backfill should reject invalid date formats."""
-        await withings_service.save_tokens(
-            access_token="token",
-            refresh_token="refresh",
-            expires_at=datetime.utcnow() + timedelta(hours=3),
-        )
-
         response = await client.post(
             "/withings/backfill",
             json={"start_date": "not-a-date", "end_date": "2024-01-31"},
@@ -140,53 +144,6 @@ class TestInputValidation:
         )
         assert response.status_code == 422
 
-    @pytest.mark.asyncio
-    async def test_sync_handles_negative_values(self, test_db):
-        """Sync should handle negative measurement values gracefully."""
-        # Some sensors might report negative values (e.g., calibration errors)
-        measure_groups = [
-            {
-                "grpid": 999,
-                "date": int(datetime(2024, 1, 15, 8, 0).timestamp()),
-                "measures": [{"type": 1, "value": -1000, "unit": -3}],  # Negative weight
-            }
-        ]
-
-        # Should not crash, may skip or handle
-        count = await withings_sync.sync_body_measurements(measure_groups)
-        # Implementation should handle this gracefully
-        assert count >= 0
-
-    @pytest.mark.asyncio
-    async def test_sync_handles_extreme_values(self, test_db):
-        """Sync should handle extreme measurement values."""
-        measure_groups = [
-            {
-                "grpid": 998,
-                "date": int(datetime(2024, 1, 15, 8, 0).timestamp()),
-                "measures": [{"type": 1, "value": 999999999, "unit": -3}],  # ~1M kg
-            }
-        ]
-
-        # Should not crash
-        count = await withings_sync.sync_body_measurements(measure_groups)
-        assert count >= 0
-
-    @pytest.mark.asyncio
-    async def test_sync_handles_missing_grpid(self, test_db):
-        """Sync should handle missing group ID."""
-        measure_groups = [
-            {
-                # No grpid
-                "date": int(datetime(2024, 1, 15, 8, 0).timestamp()),
-                "measures": [{"type": 1, "value": 75000, "unit": -3}],
-            }
-        ]
-
-        # Should handle gracefully (grpid becomes "None" string)
-        count = await withings_sync.sync_body_measurements(measure_groups)
-        assert count >= 0
-
 
 class TestEdgeCases:
     """Edge case tests for robustness."""
@@ -198,43 +155,42 @@ class TestEdgeCases:
         assert count == 0
 
     @pytest.mark.asyncio
-    async def test_sync_measure_group_no_measures(self, test_db):
-        """Sync should handle measure groups with no measures array."""
-        measure_groups = [
+    @pytest.mark.parametrize("group,expected_counts", [
+        # Negative weight (e.g. a calibration error): may skip or store, must not crash
+        pytest.param(
+            {"grpid": 996, "date": _TS_JAN15_08, "measures": [{"type": 1, "value": -1000, "unit": -3}]},
+            (0, 1),
+            id="negative",
+        ),
+        # ~1M kg: must not crash
+        pytest.param(
+            {"grpid": 995, "date": _TS_JAN15_08, "measures": [{"type": 1, "value": 999999999, "unit": -3}]},
+            (0, 1),
+            id="extreme",
+        ),
+        # grpid missing (withings_id becomes the string "None"): must not crash
+        pytest.param(
+            {"date": _TS_JAN15_08, "measures": [{"type": 1, "value": 75000, "unit": -3}]},
+            (0, 1),
+            id="missing-grpid",
+        ),
+        # No weight, so the group is skipped
+        pytest.param({"grpid": 992, "date": _TS_JAN15_08, "measures": []}, (0,), id="no-measures"),
+        # Unknown types are ignored; the weight is still stored
+        pytest.param(
             {
-                "grpid": 997,
-                "date": int(datetime(2024, 1, 15, 8, 0).timestamp()),
-                "measures": [],  # Empty measures
-            }
-        ]
-
-        count = await withings_sync.sync_body_measurements(measure_groups)
-        assert count == 0  # No weight, so should skip
-
-    @pytest.mark.asyncio
-    async def test_sync_handles_unknown_measure_types(self, test_db):
-        """Sync should ignore unknown measurement types."""
-        measure_groups = [
-            {
-                "grpid": 996,
-                "date": int(datetime(2024, 1, 15, 8, 0).timestamp()),
-                "measures": [
-                    {"type": 1, "value": 75000, "unit": -3},    # Weight (known)
-                    {"type": 99999, "value": 100, "unit": 0},   # Unknown type
-                ],
-            }
-        ]
-
-        count = await withings_sync.sync_body_measurements(measure_groups)
-        assert count == 1  # Should still process the weight
-
-        # Verify data was stored
-        async with get_db() as db:
-            cursor = await db.execute(
-                "SELECT * FROM body_measurements WHERE withings_id = '996'"
-            )
-            row = await cursor.fetchone()
-            assert row is not None
+                "grpid": 994,
+                "date": _TS_JAN15_08,
+                "measures": [{"type": 1, "value": 75000, "unit": -3}, {"type": 99999, "value": 100, "unit": 0}],
+            },
+            (1,),
+            id="unknown-type",
+        ),
+    ])
+    async def test_sync_body_measurements_edge_cases(self, test_db, group, expected_counts):
+        """Sync should handle unusual body measurement groups gracefully."""
+        count = await withings_sync.sync_body_measurements([group])
+        assert count in expected_counts
 
     @pytest.mark.asyncio
     async def test_sync_activity_missing_date(self, test_db):
@@ -272,7 +228,7 @@ class TestEdgeCases:
         bp_data = [
             {
                 "grpid": 995,
-                "date": int(datetime(2024, 1, 15, 8, 0).timestamp()),
+                "date": _TS_JAN15_08,
                 "measures": [
                     {"type": 10, "value": 120, "unit": 0},  # Systolic only
                 ],
@@ -283,17 +239,11 @@ class TestEdgeCases:
         assert count == 0  # Should skip incomplete BP
 
     @pytest.mark.asyncio
-    async def test_token_refresh_when_status_needs_reauth(self, test_db, monkeypatch):
+    async def test_token_refresh_when_status_needs_reauth(self, valid_tokens, monkeypatch):
         """Should not attempt refresh when status is needs_reauth."""
-        from app.config import settings
         monkeypatch.setattr(settings, "withings_client_id", "test")
         monkeypatch.setattr(settings, "withings_client_secret", "test")
 
-        await withings_service.save_tokens(
-            access_token="token",
-            refresh_token="refresh",
-            expires_at=datetime.utcnow() + timedelta(hours=3),
-        )
         await withings_service.set_status("needs_reauth")
 
         # get_valid_token should return None when needs_reauth
@@ -302,45 +252,34 @@ class TestEdgeCases:
         # The key is it shouldn't crash
 
     @pytest.mark.asyncio
-    async def test_concurrent_webhook_handling(self, client, test_db, monkeypatch):
+    async def test_concurrent_webhook_handling(self, client, valid_tokens, monkeypatch, mocked_sync_by_appli):
         """Test handling of concurrent webhook requests."""
-        from app.config import settings
         monkeypatch.setattr(settings, "withings_client_secret", "secret")
 
-        await withings_service.save_tokens(
-            access_token="token",
-            refresh_token="refresh",
-            expires_at=datetime.utcnow() + timedelta(hours=3),
-        )
-
-        body1 = b"userid=12345&appli=1&startdate=1705276800&enddate=1705363200"
-        sig1 = hmac.new(b"secret", body1, hashlib.sha256).hexdigest()
-
-        body2 = b"userid=12345&appli=4&startdate=1705276800&enddate=1705363200"
-        sig2 = hmac.new(b"secret", body2, hashlib.sha256).hexdigest()
-
-        with patch.object(withings_sync, 'sync_by_appli', new_callable=AsyncMock):
-            # Send two webhooks rapidly
-            response1 = await client.post(
+        # Send both webhooks at once so their handlers interleave on the event loop
+        response1, response2 = await asyncio.gather(
+            client.post(
                 "/withings/webhook",
-                content=body1,
+                content=_BODY1,
                 headers={
                     "Content-Type": "application/x-www-form-urlencoded",
-                    "X-Withings-Signature": sig1,
+                    "X-Withings-Signature": _SIG1,
                 },
-            )
-            response2 = await client.post(
+            ),
+            client.post(
                 "/withings/webhook",
-                content=body2,
+                content=_BODY2,
                 headers={
                     "Content-Type": "application/x-www-form-urlencoded",
-                    "X-Withings-Signature": sig2,
+                    "X-Withings-Signature": _SIG2,
                 },
-            )
+            ),
+        )
 
         # Both should succeed
         assert response1.status_code == 200
         assert response2.status_code == 200
+        assert sorted(mocked_sync_by_appli) == [1, 4]
 
 
 class TestDataIntegrity:
@@ -352,7 +291,7 @@ class TestDataIntegrity:
         measure_groups = [
             {
                 "grpid": 12345,
-                "date": int(datetime(2024, 1, 15, 8, 0).timestamp()),
+                "date": _TS_JAN15_08,
                 "measures": [{"type": 1, "value": 75000, "unit": -3}],
             }
         ]
@@ -399,7 +338,7 @@ class TestDataIntegrity:
         measure_groups = [
             {
                 "grpid": 77777,
-                "date": int(datetime(2024, 1, 15, 8, 0).timestamp()),
+                "date": _TS_JAN15_08,
                 "measures": [{"type": 1, "value": 100000, "unit": -3}],  # 100kg
             }
         ]
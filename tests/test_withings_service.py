@@ -0,0 +1,301 @@
+"""Tests for Withings service functions."""
+from datetime import timedelta
+from urllib.parse import parse_qsl
+
+import pytest
+
+from app.config import settings
+from app.models.withings import WithingsTokens
+from app.services import withings_service
+from tests.conftest import FROZEN_NOW, WEBHOOK_BODY, WEBHOOK_SIGNATURE
+
+
+def form_data(route, index: int = -1) -> dict[str, str]:
+    """Decode the form body of a request recorded by a respx route."""
+    return dict(parse_qsl(route.calls[index].request.content.decode()))
+
+
+# Tokens that expired an hour before FROZEN_NOW, for seeding token_store
+EXPIRED_TOKENS = WithingsTokens(
+    access_token="old_access",
+    refresh_token="old_refresh",
+    expires_at=FROZEN_NOW - timedelta(hours=1),
+)
+
+
+@pytest.fixture
+def token_store(monkeypatch):
+    """Keep Withings tokens in a dict instead of the database.
+
+    For tests that only check how Withings responses become WithingsTokens;
+    persistence itself is covered by test_save_and_get_tokens.
+    """
+    store = {}
+
+    async def save_tokens(access_token, refresh_token, expires_at, withings_user_id=None):
+        previous = store.get("tokens")
+        store["tokens"] = WithingsTokens(
+            access_token=access_token,
+            refresh_token=refresh_token,
+            expires_at=expires_at,
+            withings_user_id=withings_user_id or (previous and previous.withings_user_id),
+        )
+
+    async def get_tokens():
+        return store.get("tokens")
+
+    monkeypatch.setattr(withings_service, "save_tokens", save_tokens)
+    monkeypatch.setattr(withings_service, "get_tokens", get_tokens)
+    return store
+
+
+@pytest.mark.usefixtures("withings_settings", "frozen_utcnow")
+class TestWithingsService:
+    """Tests for withings_service functions."""
+
+    async def test_get_tokens_empty(self, test_db):
+        """Test get_tokens when no tokens exist."""
+        tokens = await withings_service.get_tokens()
+        assert tokens is None
+
+    async def test_save_and_get_tokens(self, test_db):
+        """Test saving and retrieving tokens."""
+        expires_at = FROZEN_NOW + timedelta(hours=3)
+
+        await withings_service.save_tokens(
+            access_token="test_access",
+            refresh_token="test_refresh",
+            expires_at=expires_at,
+            withings_user_id="12345",
+        )
+
+        tokens = await withings_service.get_tokens()
+        assert tokens is not None
+        assert tokens.access_token == "test_access"
+        assert tokens.refresh_token == "test_refresh"
+        assert tokens.expires_at == expires_at
+        assert tokens.withings_user_id == "12345"
+        assert tokens.status == "active"
+
+    async def test_set_status(self, valid_tokens):
+        """Test updating token status."""
+        await withings_service.set_status("needs_reauth")
+
+        tokens = await withings_service.get_tokens()
+        assert tokens.status == "needs_reauth"
+
+    async def test_is_token_valid_no_tokens(self, test_db):
+        """Test is_token_valid when no tokens exist."""
+        result = await withings_service.is_token_valid()
+        assert result is False
+
+    async def test_is_token_valid_expired(self, expired_tokens):
+        """Test is_token_valid with expired token."""
+        result = await withings_service.is_token_valid()
+        assert result is False
+
+    async def test_is_token_valid_active(self, valid_tokens):
+        """Test is_token_valid with valid token."""
+        result = await withings_service.is_token_valid()
+        assert result is True
+
+    @pytest.mark.parametrize("seconds_left,expected", [(59, False), (61, True)])
+    async def test_is_token_valid_expiry_buffer(self, test_db, seconds_left, expected):
+        """Test tokens within 60 seconds of expiry are treated as expired."""
+        await withings_service.save_tokens(
+            access_token="access",
+            refresh_token="refresh",
+            expires_at=FROZEN_NOW + timedelta(seconds=seconds_left),
+        )
+
+        assert await withings_service.is_token_valid() is expected
+
+    def test_verify_signature_valid(self):
+        """Test signature verification with valid signature."""
+        result = withings_service.verify_signature(WEBHOOK_BODY, WEBHOOK_SIGNATURE)
+        assert result is True
+
+    def test_verify_signature_invalid(self):
+        """Test signature verification with invalid signature."""
+        result = withings_service.verify_signature(b"test_body", "invalid_sig")
+        assert result is False
+
+    def test_verify_signature_no_secret(self, monkeypatch):
+        """Test signature verification with no client secret configured."""
+        monkeypatch.setattr(settings, "withings_client_secret", None)
+
+        result = withings_service.verify_signature(b"test_body", "any_sig")
+        assert result is False
+
+    async def test_refresh_tokens_success(self, token_store, respx_mock):
+        """Test successful token refresh."""
+        token_store["tokens"] = EXPIRED_TOKENS
+        # Mock the HTTP response
+        route = respx_mock.post(withings_service.WITHINGS_TOKEN_URL).respond(json={
+            "status": 0,
+            "body": {
+                "access_token": "new_access",
+                "refresh_token": "new_refresh",
+                "expires_in": 10800,
+                "userid": "12345",
+            },
+        })
+
+        tokens = await withings_service.refresh_tokens()
+
+        assert route.call_count == 1
+        request = form_data(route)
+        assert request["grant_type"] == "refresh_token"
+        assert request["refresh_token"] == "old_refresh"
+
+        assert tokens is not None
+        assert tokens.access_token == "new_access"
+        assert tokens.expires_at == FROZEN_NOW + timedelta(seconds=10800)
+        assert tokens.status == "active"
+
+    async def test_refresh_tokens_failure(self, valid_tokens, respx_mock):
+        """Test token refresh failure sets needs_reauth."""
+        route = respx_mock.post(withings_service.WITHINGS_TOKEN_URL).respond(json={"status": 401})  # Auth error
+
+        tokens = await withings_service.refresh_tokens()
+
+        assert route.called
+        assert tokens is None
+
+        # Check status was updated
+        stored = await withings_service.get_tokens()
+        assert stored.status == "needs_reauth"
+
+    async def test_refresh_tokens_no_tokens(self, test_db):
+        """Test refresh when no tokens exist."""
+        tokens = await withings_service.refresh_tokens()
+        assert tokens is None
+
+    async def test_get_valid_token_refreshes_if_expired(self, token_store, respx_mock):
+        """Test get_valid_token refreshes expired tokens."""
+        token_store["tokens"] = EXPIRED_TOKENS
+        route = respx_mock.post(withings_service.WITHINGS_TOKEN_URL).respond(json={
+            "status": 0,
+            "body": {
+                "access_token": "new_access",
+                "refresh_token": "new_refresh",
+                "expires_in": 10800,
+            },
+        })
+
+        token = await withings_service.get_valid_token()
+
+        assert route.call_count == 1
+        assert token == "new_access"
+
+    async def test_get_valid_token_returns_existing(self, valid_tokens):
+        """Test get_valid_token returns existing valid token."""
+        token = await withings_service.get_valid_token()
+        assert token == "valid_access"
+
+    async def test_exchange_code_success(self, token_store, respx_mock):
+        """Test exchanging authorization code for tokens."""
+        route = respx_mock.post(withings_service.WITHINGS_TOKEN_URL).respond(json={
+            "status": 0,
+            "body": {
+                "access_token": "access123",
+                "refresh_token": "refresh123",
+                "expires_in": 10800,
+                "userid": 12345,
+            },
+        })
+
+        tokens = await withings_service.exchange_code("auth_code_123")
+
+        assert route.call_count == 1
+        request = form_data(route)
+        assert request["grant_type"] == "authorization_code"
+        assert request["code"] == "auth_code_123"
+        assert request["redirect_uri"] == "https://test.example.com/withings/callback"
+
+        assert tokens is not None
+        assert tokens.access_token == "access123"
+        assert tokens.expires_at == FROZEN_NOW + timedelta(seconds=10800)
+        assert tokens.withings_user_id == "12345"
+
+    async def test_exchange_code_failure(self, test_db, respx_mock):
+        """Test exchange code failure."""
+        respx_mock.post(withings_service.WITHINGS_TOKEN_URL).respond(json={"status": 500, "error": "invalid_code"})
+
+        with pytest.raises(withings_service.TokenExchangeError) as exc_info:
+            await withings_service.exchange_code("bad_code")
+
+        assert exc_info.value.status == 500
+        assert exc_info.value.error == "invalid_code"
+
+    @pytest.mark.parametrize("status", [
+        0,  # Newly subscribed
+        294,  # Already subscribed
+    ])
+    async def test_subscribe_webhook_success(self, valid_tokens, respx_mock, status):
+        """Test subscribing to webhook succeeds when new or already subscribed."""
+        route = respx_mock.post(withings_service.WITHINGS_NOTIFY_URL).respond(json={"status": status})
+
+        success, data = await withings_service.subscribe_webhook(1)
+
+        assert route.call_count == 1
+        assert form_data(route)["action"] == "subscribe"
+        assert route.calls.last.request.headers["Authorization"] == "Bearer valid_access"
+
+        assert success is True
+        assert data.get("status") == status
+
+    async def test_subscribe_webhook_no_token(self, test_db):
+        """Test subscribing without valid token."""
+        success, data = await withings_service.subscribe_webhook(1)
+        assert success is False
+
+    async def test_unsubscribe_webhook_success(self, valid_tokens, respx_mock):
+        """Test unsubscribing from webhook."""
+        route = respx_mock.post(withings_service.WITHINGS_NOTIFY_URL).respond(json={"status": 0})
+
+        result = await withings_service.unsubscribe_webhook(1)
+
+        assert route.call_count == 1
+        assert form_data(route)["action"] == "revoke"
+
+        assert result is True
+
+    async def test_get_subscriptions_success(self, valid_tokens, respx_mock):
+        """Test getting list of subscriptions."""
+        route = respx_mock.post(withings_service.WITHINGS_NOTIFY_URL).respond(json={
+            "status": 0,
+            "body": {
+                "profiles": [
+                    {"appli": 1},
+                    {"appli": 4},
+                    {"appli": 16},
+                ],
+            },
+        })
+
+        subs = await withings_service.get_subscriptions()
+
+        assert form_data(route)["action"] == "list"
+
+        assert subs == [1, 4, 16]
+
+    async def test_get_subscriptions_no_token(self, test_db):
+        """Test getting subscriptions without token."""
+        subs = await withings_service.get_subscriptions()
+        assert subs == []
+
+    async def test_disconnect(self, valid_tokens, respx_mock):
+        """Test disconnecting Withings integration."""
+        notify = respx_mock.post(withings_service.WITHINGS_NOTIFY_URL).respond(json={"status": 0})
+        respx_mock.post(withings_service.WITHINGS_TOKEN_URL).respond(json={"status": 0})
+
+        count = await withings_service.disconnect()
+
+        # Should have unsubscribed from 4 webhooks
+        assert count == 4
+        assert [form_data(notify, i)["appli"] for i in range(notify.call_count)] == ["1", "4", "16", "44"]
+
+        # Tokens should be deleted
+        tokens = await withings_service.get_tokens()
+        assert tokens is None
@@ -1,12 +1,14 @@
 """Tests for Withings data synchronization."""
+import asyncio
 import os
 import time
+import httpx
 import pytest
 from datetime import datetime, date, timezone
 from unittest.mock import patch, AsyncMock
 
 from app.services import withings_sync
-from app.database import get_db
+from app.database import get_db, init_db
 
 
 class TestUnitConversions:
@@ -86,6 +88,23 @@ class TestSyncBodyMeasurements:
         assert count1 == 1
         assert count2 == 0  # Duplicate skipped
 
+    @pytest.mark.asyncio
+    async def test_sync_body_measurements_deduplicates_within_batch(self, test_db):
+        """Test that a group repeated within one batch is stored once."""
+        group = {
+            "grpid": 12345,
+            "date": int(datetime(2024, 1, 15, 8, 30).timestamp()),
+            "measures": [{"type": 1, "value": 80000, "unit": -3}],
+        }
+
+        count = await withings_sync.sync_body_measurements([group, group])
+
+        assert count == 1
+        async with get_db() as db:
+            cursor = await db.execute("SELECT COUNT(*) as cnt FROM body_measurements WHERE withings_id = '12345'")
+            row = await cursor.fetchone()
+            assert row["cnt"] == 1
+
     @pytest.mark.asyncio
     async def test_sync_body_measurements_uses_utc(self, test_db, monkeypatch):
         """Timestamps should be interpreted in UTC regardless of server timezone."""
@@ -179,6 +198,29 @@ class TestSyncBloodPressure:
 
         assert row["heart_rate"] is None
 
+    @pytest.mark.asyncio
+    async def test_init_db_drops_duplicate_withings_ids(self, tmp_path):
+        """Test that migrating a database synced before the unique index keeps one copy per record."""
+        db_path = str(tmp_path / "legacy.db")
+        await init_db(db_path)
+        async with get_db(db_path) as db:
+            await db.execute("DROP INDEX idx_blood_pressure_withings_id")
+            await db.executemany(
+                """
+                INSERT INTO blood_pressure (date, time, systolic, diastolic, source, withings_id)
+                VALUES ('2024-01-15', '09:00:00', ?, 80, 'withings', '67892')
+                """,
+                [(120,), (121,)],
+            )
+            await db.commit()
+
+        await init_db(db_path)
+
+        async with get_db(db_path) as db:
+            cursor = await db.execute("SELECT systolic FROM blood_pressure WHERE withings_id = '67892'")
+            rows = await cursor.fetchall()
+        assert [row["systolic"] for row in rows] == [120]
+
 
 class TestSyncActivity:
     """Tests for activity sync."""
@@ -228,6 +270,25 @@ class TestSyncActivity:
             assert row["steps"] == 10000  # Updated value
 
 
+    @pytest.mark.asyncio
+    async def test_sync_activity_spans_upsert_chunks(self, test_db):
+        """Test that a batch larger than one multi-row upsert stores every day."""
+        days = withings_sync.ACTIVITY_UPSERT_CHUNK + 50
+        activities = [
+            {"date": date.fromordinal(date(2024, 1, 1).toordinal() + i).isoformat(), "steps": i}
+            for i in range(days)
+        ]
+
+        count = await withings_sync.sync_activity(activities)
+
+        assert count == days
+        async with get_db() as db:
+            cursor = await db.execute("SELECT COUNT(*) as cnt, MAX(steps) as max_steps FROM daily_activity")
+            row = await cursor.fetchone()
+        assert row["cnt"] == days
+        assert row["max_steps"] == days - 1
+
+
 class TestSyncSleep:
     """Tests for sleep sync."""
 
@@ -304,6 +365,27 @@ class TestSyncByAppli:
         count = await withings_sync.sync_by_appli(4)
         assert count == 0
 
+    @pytest.mark.asyncio
+    async def test_sync_by_appli_bp_stores_blood_pressure(self, test_db, monkeypatch):
+        """Test that appli 4 stores fetched groups as blood pressure, not body measurements."""
+        group = {
+            "grpid": 67893,
+            "date": int(datetime(2024, 1, 15, 9, 0).timestamp()),
+            "measures": [
+                {"type": 10, "value": 120, "unit": 0},
+                {"type": 9, "value": 80, "unit": 0},
+            ],
+        }
+        monkeypatch.setattr(withings_sync, 'fetch_measurements', AsyncMock(return_value=[group]))
+
+        count = await withings_sync.sync_by_appli(4)
+
+        assert count == 1
+        async with get_db() as db:
+            cursor = await db.execute("SELECT systolic FROM blood_pressure WHERE withings_id = '67893'")
+            row = await cursor.fetchone()
+        assert row["systolic"] == 120
+
     @pytest.mark.asyncio
     async def test_sync_by_appli_activity(self, test_db, monkeypatch):
         """Test sync_by_appli for activity (appli 16)."""
@@ -344,6 +426,20 @@ class TestSyncByAppli:
         mock_fetch.assert_called_once()
 
 
+class TestHttpClient:
+    """Tests for the shared Withings HTTP client."""
+
+    @pytest.mark.asyncio
+    async def test_get_client_is_shared_until_closed(self):
+        client = withings_sync.get_client()
+        assert withings_sync.get_client() is client
+
+        await withings_sync.close_client()
+
+        assert client.is_closed
+        assert withings_sync.get_client() is not client
+
+
 class TestFetchMeasurements:
     """Tests for fetch_measurements function."""
 
@@ -356,15 +452,14 @@ class TestFetchMeasurements:
     @pytest.mark.asyncio
     async def test_fetch_measurements_api_error(self, test_db, monkeypatch):
         """Test fetch_measurements handles API errors."""
-        from unittest.mock import AsyncMock, MagicMock
+        from unittest.mock import AsyncMock
         from app.services import withings_service
 
         # Set up valid token
         monkeypatch.setattr(withings_service, 'get_valid_token', AsyncMock(return_value="valid_token"))
 
         # Mock API error response
-        mock_response = MagicMock()
-        mock_response.json.return_value = {"status": 401}
+        mock_response = httpx.Response(200, json={"status": 401})
 
         with patch("httpx.AsyncClient.post", new_callable=AsyncMock) as mock_post:
             mock_post.return_value = mock_response
@@ -375,20 +470,19 @@ class TestFetchMeasurements:
     @pytest.mark.asyncio
     async def test_fetch_measurements_success(self, test_db, monkeypatch):
         """Test fetch_measurements success."""
-        from unittest.mock import AsyncMock, MagicMock
+        from unittest.mock import AsyncMock
         from app.services import withings_service
 
         monkeypatch.setattr(withings_service, 'get_valid_token', AsyncMock(return_value="valid_token"))
 
-        mock_response = MagicMock()
-        mock_response.json.return_value = {
+        mock_response = httpx.Response(200, json={
             "status": 0,
             "body": {
                 "measuregrps": [
                     {"grpid": 123, "date": 1705312800, "measures": []}
                 ]
             }
-        }
+        })
 
         with patch("httpx.AsyncClient.post", new_callable=AsyncMock) as mock_post:
             mock_post.return_value = mock_response
@@ -409,20 +503,19 @@ class TestFetchActivity:
     @pytest.mark.asyncio
     async def test_fetch_activity_success(self, test_db, monkeypatch):
         """Test fetch_activity success."""
-        from unittest.mock import AsyncMock, MagicMock
+        from unittest.mock import AsyncMock
         from app.services import withings_service
 
         monkeypatch.setattr(withings_service, 'get_valid_token', AsyncMock(return_value="valid_token"))
 
-        mock_response = MagicMock()
-        mock_response.json.return_value = {
+        mock_response = httpx.Response(200, json={
             "status": 0,
             "body": {
                 "activities": [
                     {"date": "2024-01-15", "steps": 10000}
                 ]
             }
-        }
+        })
 
         with patch("httpx.AsyncClient.post", new_callable=AsyncMock) as mock_post:
             mock_post.return_value = mock_response
@@ -443,20 +536,19 @@ class TestFetchSleep:
     @pytest.mark.asyncio
     async def test_fetch_sleep_success(self, test_db, monkeypatch):
         """Test fetch_sleep success."""
-        from unittest.mock import AsyncMock, MagicMock
+        from unittest.mock import AsyncMock
         from app.services import withings_service
 
         monkeypatch.setattr(withings_service, 'get_valid_token', AsyncMock(return_value="valid_token"))
 
-        mock_response = MagicMock()
-        mock_response.json.return_value = {
+        mock_response = httpx.Response(200, json={
             "status": 0,
             "body": {
                 "series": [
                     {"id": 123, "date": "2024-01-15"}
                 ]
             }
-        }
+        })
 
         with patch("httpx.AsyncClient.post", new_callable=AsyncMock) as mock_post:
             mock_post.return_value = mock_response
@@ -465,6 +557,14 @@ class TestFetchSleep:
         assert len(result) == 1
 
 
+def pages(*batches):
+    """Stand-in for withings_sync.iter_measurement_pages that yields the given pages."""
+    async def iter_measurement_pages(start_date, end_date):
+        for batch in batches:
+            yield batch
+    return iter_measurement_pages
+
+
 class TestBackfillAll:
     """Tests for backfill functionality."""
 
@@ -474,7 +574,7 @@ class TestBackfillAll:
         from unittest.mock import AsyncMock
 
         # Mock all fetch functions to return empty lists
-        monkeypatch.setattr(withings_sync, 'fetch_measurements', AsyncMock(return_value=[]))
+        monkeypatch.setattr(withings_sync, 'iter_measurement_pages', pages())
         monkeypatch.setattr(withings_sync, 'fetch_activity', AsyncMock(return_value=[]))
         monkeypatch.setattr(withings_sync, 'fetch_sleep', AsyncMock(return_value=[]))
 
@@ -488,12 +588,81 @@ class TestBackfillAll:
         assert counts["daily_activity"] == 0
         assert counts["sleep"] == 0
 
+    @pytest.mark.asyncio
+    async def test_backfill_all_stores_each_measurement_page(self, test_db, monkeypatch):
+        """Test that counts add up across measurement pages stored as they arrive."""
+        def group(grpid):
+            return {
+                "grpid": grpid,
+                "date": int(datetime(2024, 1, 15, 8, 30).timestamp()),
+                "measures": [{"type": 1, "value": 80000, "unit": -3}],
+            }
+
+        monkeypatch.setattr(withings_sync, 'iter_measurement_pages', pages([group(1), group(2)], [group(3)]))
+        monkeypatch.setattr(withings_sync, 'fetch_activity', AsyncMock(return_value=[]))
+        monkeypatch.setattr(withings_sync, 'fetch_sleep', AsyncMock(return_value=[]))
+
+        counts = await withings_sync.backfill_all(date(2024, 1, 1), date(2024, 1, 31))
+
+        assert counts["body_measurements"] == 3
+        assert counts["blood_pressure"] == 0
+
+    @pytest.mark.asyncio
+    async def test_backfill_all_fetches_concurrently(self, test_db, monkeypatch):
+        """Test that the three fetches are in flight together rather than one after another."""
+        started = []
+
+        def fake_fetch(name):
+            async def fetch(start_date, end_date):
+                started.append(name)
+                await asyncio.sleep(0)
+                # Every fetch has started by the time the first one resumes
+                assert len(started) == 3
+                return []
+            return fetch
+
+        async def fake_iter_measurement_pages(start_date, end_date):
+            yield await fake_fetch("measurements")(start_date, end_date)
+
+        monkeypatch.setattr(withings_sync, 'iter_measurement_pages', fake_iter_measurement_pages)
+        monkeypatch.setattr(withings_sync, 'fetch_activity', fake_fetch("activity"))
+        monkeypatch.setattr(withings_sync, 'fetch_sleep', fake_fetch("sleep"))
+
+        await withings_sync.backfill_all(date(2024, 1, 1), date(2024, 1, 31))
+
+        assert sorted(started) == ["activity", "measurements", "sleep"]
+
+    @pytest.mark.asyncio
+    async def test_backfill_all_stores_while_fetching(self, test_db, monkeypatch):
+        """Test that a fetched type is stored without waiting for the slower fetches."""
+        measurements_stored = asyncio.Event()
+        sync_body_measurements = withings_sync.sync_body_measurements
+
+        async def tracking_sync_body_measurements(groups):
+            count = await sync_body_measurements(groups)
+            measurements_stored.set()
+            return count
+
+        async def slow_fetch_sleep(start_date, end_date):
+            # Only finishes once the measurements have been written
+            await asyncio.wait_for(measurements_stored.wait(), timeout=1)
+            return []
+
+        monkeypatch.setattr(withings_sync, 'iter_measurement_pages', pages([]))
+        monkeypatch.setattr(withings_sync, 'fetch_activity', AsyncMock(return_value=[]))
+        monkeypatch.setattr(withings_sync, 'fetch_sleep', slow_fetch_sleep)
+        monkeypatch.setattr(withings_sync, 'sync_body_measurements', tracking_sync_body_measurements)
+
+        counts = await withings_sync.backfill_all(date(2024, 1, 1), date(2024, 1, 31))
+
+        assert counts["sleep"] == 0
+
     @pytest.mark.asyncio
     async def test_backfill_full_history(self, test_db, monkeypatch):
         """Test backfill_full_history function."""
         from unittest.mock import AsyncMock
 
-        monkeypatch.setattr(withings_sync, 'fetch_measurements', AsyncMock(return_value=[]))
+        monkeypatch.setattr(withings_sync, 'iter_measurement_pages', pages())
         monkeypatch.setattr(withings_sync, 'fetch_activity', AsyncMock(return_value=[]))
         monkeypatch.setattr(withings_sync, 'fetch_sleep', AsyncMock(return_value=[]))
 